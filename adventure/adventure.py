@@ -25,20 +25,22 @@
 
 import logging
 import textwrap
+from collections import namedtuple
 from io import StringIO
 from uuid import uuid4
 
 from lazy import lazy
-from lxml import etree
 from web_fragments.fragment import Fragment
 from xblock.completable import CompletableXBlockMixin
 from xblock.core import XBlock
-from xblock.fields import UNIQUE_ID, Integer, List, Scope, String
+from xblock.fields import UNIQUE_ID, Dict, Float, Integer, List, Scope, String
 
 from mentoring.light_children import XBlockWithLightChildren
-from mentoring.title import TitleBlock
-from adventure.info import InfoBlock
-from adventure.step import StepBlock
+from adventure.assets import load_manifest
+from adventure.cache import LRUCache, content_digest, get_render_cache
+from adventure.graph import ARTIFACT_FORMAT, StepGraph, compute_progress, validate_step_nodes
+from adventure.i18n import get_i18n_service, get_language
+from adventure.instrumentation import get_instrumentation, instrumented
 from adventure.utils import loader
 from adventure.constants import JS_URLS, CSS_URLS, JS_TEMPLATES
 
@@ -46,6 +48,34 @@ from adventure.constants import JS_URLS, CSS_URLS, JS_TEMPLATES
 
 log = logging.getLogger(__name__)
 
+# Process-wide cache of the parsed `xml_content`, keyed by content digest.
+# Its size can be changed with the `PARSED_ADVENTURES_CACHE_SIZE` XBlock setting.
+DEFAULT_PARSED_ADVENTURES_CACHE_SIZE = 64
+PARSED_ADVENTURES = LRUCache(maxsize=DEFAULT_PARSED_ADVENTURES_CACHE_SIZE)
+
+# Process-wide cache of the progress tables, keyed by content digest
+PROGRESS_TABLES = LRUCache(maxsize=DEFAULT_PARSED_ADVENTURES_CACHE_SIZE)
+
+# Process-wide cache of the rendered client-side templates, keyed by language
+JS_TEMPLATE_RESOURCES = LRUCache(maxsize=32)
+
+# Completion modes, see the `COMPLETION_MODE` setting
+COMPLETION_FIRST_STEP_VISITED = 'first-step-visited'
+COMPLETION_TERMINAL_REACHED = 'terminal-reached'
+COMPLETION_ALL_STEPS_VISITED = 'all-steps-visited'
+COMPLETION_PROGRESS = 'progress'
+
+AdventureChildren = namedtuple('AdventureChildren', ['title', 'info', 'steps'])
+
+# Maximum number of steps prefetched along with a step, see the `MAX_PREFETCHED_STEPS` setting.
+DEFAULT_MAX_PREFETCHED_STEPS = 8
+
+# Maximum number of events of a `publish_events` batch
+MAX_EVENTS_PER_BATCH = 100
+
+# Number of student choices kept in `student_trajectory`, see the `TRAJECTORY_RETENTION` setting.
+DEFAULT_TRAJECTORY_RETENTION = 100
+
 
 DEFAULT_XML_CONTENT = textwrap.dedent("""\
 <adventure display_name="Nav tooltip title">
@@ -122,217 +152,570 @@ class AdventureBlock(CompletableXBlockMixin, XBlockWithLightChildren):
     adventure_id = String(scope=Scope.settings, default=UNIQUE_ID)
 
     xml_content = String(help="XML content", scope=Scope.content, default=DEFAULT_XML_CONTENT)
+    compiled_content = Dict(help="Precompiled step table of the xml_content, see StepGraph.to_artifact.",
+                            default={}, scope=Scope.content)
     current_step_name = String(help="Keep track of the student assessment progress.",
                                default='', scope=Scope.user_state)
-    student_choices = List(help="Store answers of student choices.", default=[],
-                           scope=Scope.user_state)
+    student_choices = List(help="Store answers of student choices (legacy, see student_trajectory).",
+                           default=[], scope=Scope.user_state)
+    student_latest_choices = Dict(help="Index of the latest student choice of each step.", default={},
+                                  scope=Scope.user_state)
+    student_trajectory = List(help="Most recent student choices, as [step index, choice index] pairs.",
+                              default=[], scope=Scope.user_state)
+    student_trajectory_digest = String(help="Content digest the student_trajectory indices refer to.",
+                                       default='', scope=Scope.user_state)
+    student_choice_count = Integer(help="Total number of choices made by the student.", default=0,
+                                   scope=Scope.user_state)
+    visited_steps = List(help="Names of the steps visited by the student, in the all-steps-visited "
+                              "completion mode.", default=[], scope=Scope.user_state)
+    reported_completion = Float(help="Last completion reported to the completion service.", default=0.0,
+                                scope=Scope.user_state)
 
     display_name = String(help="Display name of the component", default="Adventure",
                           scope=Scope.settings)
 
-    def _get_current_step(self):
+    def load_children_from_xml_content(self):
+        """
+        Apply the attributes of the `xml_content` root element to the block right away,
+        and load light children on the first access to `light_children`: navigation only
+        needs the compiled `graph`.
         """
-        Find the current step in the list with *current_step*.
+        self._light_children = None
+        if not self.xml_content or callable(self.xml_content):
+            return
+
+        for name, value in self._get_root_attributes():
+            setattr(self, name, value)
 
-        Return a StepBlock object.
+    def _get_root_attributes(self):
         """
-        for step in self.steps:
-            if step.name == self.current_step_name:
-                return step
-        return None
+        Returns the attributes of the `xml_content` root element, as (name, value) pairs,
+        from the compiled artifact when possible, from the parsed `xml_content` otherwise.
+        """
+        artifact = self.compiled_artifact
+        if artifact is not None and 'root_attributes' in artifact:
+            return artifact['root_attributes']
+        return self._get_parsed_xml_content().items()
 
-    def _get_next_step(self, next_step_name=None):
+    @property
+    def light_children(self):
+        if getattr(self, '_light_children', None) is None:
+            self._light_children = []
+            self._load_light_children()
+        return self._light_children
+
+    @light_children.setter
+    def light_children(self, value):
+        self._light_children = value
+
+    def _load_light_children(self):
         """
-        Find the next step. If step_name is specified, look for that name.
+        Load light children from the `xml_content` attribute.
 
-        Returns a StepBlock object.
+        The parsed XML is shared by all the blocks of the process with the same content.
         """
-        if next_step_name:
-            return self._get_step_by_name(next_step_name)
+        if not self.xml_content or callable(self.xml_content):
+            return
 
-        current_step = self._get_current_step()
-        if current_step and current_step.next and not current_step.has_choices:
-            return self._get_step_by_name(current_step.next)
+        with self.instrumentation.span('load_children'):
+            node = self._get_parsed_xml_content()
+            # The root attributes were applied along with the block creation
+            XBlockWithLightChildren.init_block_from_node(self, node, ())
 
-        return None
+    def _get_parsed_xml_content(self):
+        """
+        Returns the root node of the parsed `xml_content`, from the process-wide cache.
+        """
+        cache_size = self.adventure_settings.get(
+            'PARSED_ADVENTURES_CACHE_SIZE', DEFAULT_PARSED_ADVENTURES_CACHE_SIZE)
+        if PARSED_ADVENTURES.maxsize != cache_size:
+            PARSED_ADVENTURES.resize(cache_size)
 
-    def _get_previous_step(self):
+        xml_content = self.xml_content
+
+        def parse():
+            from lxml import etree  # pylint: disable=import-outside-toplevel
+            parser = etree.XMLParser(remove_comments=True)
+            return etree.parse(StringIO(xml_content), parser=parser).getroot()
+
+        return PARSED_ADVENTURES.get_or_create(content_digest(xml_content), parse)
+
+    def _get_next_step_name(self, next_step_name=None):
         """
-        Find the previous step. Returns a StepBlock object.
+        Find the name of the next step. If next_step_name is specified, check that step exists
+        and is reachable from the current step.
+
+        Returns None if there is no valid next step.
         """
-        current_step = self._get_current_step()
-        if current_step and current_step.back:
-            for step in self.steps:
-                if step.name == current_step.back:
-                    return step
+        current_step_name = self.current_step_name
+        if next_step_name:
+            if next_step_name in self.graph and next_step_name in self.graph.forward_edges(current_step_name):
+                return next_step_name
+            return None
+
+        node = self.graph.node(current_step_name)
+        if node and node.next in self.graph and not self.graph.has_choices(current_step_name):
+            return node.next
 
         return None
 
     def _get_step_by_name(self, name):
         """
-        Find a step in the list by its name. Return a StepBlock object.
+        Find a step by its name. Return a StepBlock object.
         """
-        for step in self.steps:
-            if step.name == name:
-                return step
-        return None
+        if name not in self.graph:
+            return None
+        return self.steps_by_name.get(name)
 
-    def _get_student_choice(self, step):
+    def _get_student_choice(self, step_name):
         """
         Return the student choice for a step.
         """
-        for choice in reversed(self.student_choices):
-            if choice['step'] == step.name:
-                return choice['choice']
+        return self._get_latest_choices().get(step_name)
 
-        return None
+    def _get_latest_choices(self):
+        """
+        Return the index of the latest student choice of each step.
+
+        For students whose choices were saved before the index existed, the index
+        is derived from *student_choices* on first access.
+        """
+        if self.student_choices:
+            self._migrate_student_choices()
+        return self.student_latest_choices
+
+    def _migrate_student_choices(self):
+        """
+        Move the legacy *student_choices* history to the choice index and the compact trajectory.
+        """
+        for choice in self.student_choices:
+            self.student_latest_choices[choice['step']] = choice['choice']
+            self._record_student_choice(choice['step'], choice['choice'])
+        self.student_choices = []
+
+    def _record_student_choice(self, step_name, choice):
+        """
+        Append a choice to the compact trajectory of the student.
+
+        Choices are stored as indices in the compiled steps, and only the last
+        `TRAJECTORY_RETENTION` ones are kept, along with the total count.
+        """
+        self.student_choice_count += 1
+
+        retention = self.adventure_settings.get('TRAJECTORY_RETENTION', DEFAULT_TRAJECTORY_RETENTION)
+        if self.student_trajectory_digest != self.content_digest:
+            # The indices of another content version are meaningless now
+            self.student_trajectory = []
+            self.student_trajectory_digest = self.content_digest
+
+        step_index = self.graph.index_of(step_name)
+        choice_index = self.graph.index_of(choice)
+        if retention <= 0 or step_index is None or choice_index is None:
+            return
+
+        trajectory = self.student_trajectory
+        trajectory.append([step_index, choice_index])
+        if len(trajectory) > retention:
+            del trajectory[:len(trajectory) - retention]
 
     def _save_student_choice(self, submission):
         """
         Save the choice submitted by the student.
         """
-        step = self._get_current_step()
-        self.student_choices.append({
-            'step': step.name,
-            'choice': submission['choice']
-        })
-
-    def _validate_steps(self, steps):
-        """
-        Validate steps from the studio submission.
-
-        * All steps must have a "name" attribute.
-        * All step names must be unique.
-        * The first step name must be "first"
-        * All back attribute must be a valid step name.
-        * All next attribute must be a valid step name.
-        * All mcq must contain choices.
-        * All mcq choice values must be a valid step name.
-
-        Raises a ValueError exception on error.
-        """
-
-        step_names = []
-        for step in steps:
-            name = step.attrib.get('name', '')
-            if not name or name in step_names:
-                raise ValueError('All steps must be a unique.')
-            step_names.append(name)
-
-        # TODO remove this constraint everywhere, use steps[0].name
-        if step_names and step_names[0] != "first":
-            raise ValueError('The first step name must be "first"')
-
-        for step in steps:
-            # Check if the back attribute is valid
-            back = step.attrib.get('back', None)
-            if back is not None and back not in step_names:
-                raise ValueError('All step "back" attributes must be a valid step name.')
-
-            # Check if the next attribute is valid
-            next = step.attrib.get('next', None)  # pylint: disable=redefined-builtin
-            if next is not None and next not in step_names:
-                raise ValueError('All step "next" attributes must be a valid step name.')
-
-            # Check if the mcq choice values are valid
-            mcq = step.find('mcq')
-            if mcq is not None:
-                choices = mcq.findall('choice')
-                if not choices:
-                    raise ValueError('All mcq must contain choices.')
-                for choice in choices:
-                    value = choice.attrib.get('value', None)
-                    if value is None or value not in step_names:
-                        raise ValueError('All mcq choice values must be a valid step name.')
-
-    def _render_current_step(self):
+        step_name = self.current_step_name
+        self._get_latest_choices()[step_name] = submission['choice']
+        self._record_student_choice(step_name, submission['choice'])
+
+    def _render_current_step(self, cached_steps=frozenset()):
         """
         Render the json response of the current step.
-        """
-        step_names = [step.name for step in self.steps]
 
+        `cached_steps` are the names of the steps the client already holds for the
+        current content version, see `_get_cached_steps`.
+        """
         if not self.has_steps:
             response = {
                 'result': 'error',
                 'message': 'No step in the adventure'
             }
         else:
-            if self.current_step_name not in step_names:
+            if self.current_step_name not in self.graph:
                 # something change in studio and the step is no more available.
                 self.current_step_name = "first"
 
-            current_step = self._get_current_step()
-            step_fragment = current_step.render()
-            # TODO move this rendering in the StepBlock itself
+            self._update_completion()
+
             response = {
                 'result': 'success',
-                'step': {
-                    'name': current_step.name,
-                    'has_back_step': bool(current_step.back),
-                    'has_next_step': bool(current_step.next),
-                    'can_start_over': not bool(self.current_step_name == 'first'),
-                    'html': step_fragment.content,
-                    'has_choices': current_step.has_choices,
-                    'student_choice': self._get_student_choice(current_step),
-                    'xblocks': [],
-                    # this should only be once in the app config...
-                    'is_studio': getattr(getattr(self, 'xmodule_runtime', None), 'is_author_mode', False)
-                }
+                'version': self.content_digest,
+                'step': self._render_step(self.current_step_name, cached_steps)
             }
 
-            ooyala_players = current_step.ooyala_players
-            for child in ooyala_players:
-                xblock = child.xblock_view()
-                xblock['data'] = {
-                    'step': current_step.name,
-                    'child': child.name
-                }
-                response['step']['xblocks'].append({
+        return response
+
+    def _update_completion(self):
+        """
+        Report the completion of the adventure once the student is on the current step,
+        according to the `COMPLETION_MODE` setting:
+
+        * `first-step-visited`: complete as soon as the adventure is shown,
+        * `terminal-reached` (default): complete when reaching a final step,
+        * `all-steps-visited`: complete once every step reachable from the first one was visited,
+        * `progress`: report the fraction of the adventure done, whenever it increases.
+
+        The full completion is only reported once.
+        """
+        if self.reported_completion >= 1.0:
+            return
+
+        mode = self.adventure_settings.get('COMPLETION_MODE', COMPLETION_TERMINAL_REACHED)
+        step_name = self.current_step_name
+        if mode == COMPLETION_FIRST_STEP_VISITED:
+            completed = True
+        elif mode == COMPLETION_ALL_STEPS_VISITED:
+            if step_name not in self.visited_steps:
+                self.visited_steps.append(step_name)
+            completed = self.reachable_step_names.issubset(self.visited_steps)
+        elif mode == COMPLETION_PROGRESS:
+            fraction = self.progress_table[step_name].fraction
+            if fraction is not None and 0 < fraction < 1.0 and fraction > self.reported_completion:
+                with self.instrumentation.span('emit_completion'):
+                    self.emit_completion(fraction)
+                self.reported_completion = fraction
+            completed = fraction == 1.0
+        else:
+            completed = self.graph.is_terminal(step_name)
+
+        if completed:
+            with self.instrumentation.span('emit_completion'):
+                self.emit_completion(1.0)
+            self.reported_completion = 1.0
+
+    def _render_step(self, step_name, cached_steps=frozenset()):
+        """
+        Render the json payload of a step, as it is once the student is on that step.
+
+        When the client already holds the step content, `html` and `xblocks` are
+        left out and the payload is flagged as `not_modified`.
+        """
+        node = self.graph.node(step_name)
+        not_modified = step_name in cached_steps
+        step_content = {} if not_modified else self._render_step_content(step_name)
+
+        # TODO move this rendering in the StepBlock itself
+        return {
+            'name': step_name,
+            'back_step': node.back,
+            'next_step': node.next,
+            'has_back_step': bool(node.back),
+            'has_next_step': bool(node.next),
+            'is_final_step': self.graph.is_terminal(step_name),
+            'can_start_over': not bool(step_name == 'first'),
+            'not_modified': not_modified,
+            'html': step_content.get('html'),
+            'has_choices': self.graph.has_choices(step_name),
+            'student_choice': self._get_student_choice(step_name),
+            'xblocks': step_content.get('xblocks'),
+            'progress': self.progress_table[step_name]._asdict(),
+            # this should only be once in the app config...
+            'is_studio': getattr(getattr(self, 'xmodule_runtime', None), 'is_author_mode', False)
+        }
+
+    def _get_cached_steps(self, submissions):
+        """
+        Returns the names of the steps the client holds in its cache, if the client
+        cache matches the current content version.
+        """
+        if not submissions or submissions.get('version') != self.content_digest:
+            return frozenset()
+        return frozenset(submissions.get('cached_steps') or ())
+
+    def _add_reachable_steps(self, response, cached_steps=frozenset()):
+        """
+        Add the payloads of the steps directly reachable from the current step (back, next
+        and MCQ choices) to a successful response, so the client can show them without
+        waiting for the server.
+
+        At most `MAX_PREFETCHED_STEPS` steps are added, the back step first: the client
+        waits for the server for the others.
+        """
+        if response['result'] != 'success':
+            return response
+
+        step_name = self.current_step_name
+        back_name = self.graph.back_edge(step_name)
+        reachable_names = [back_name] if back_name else []
+        reachable_names.extend(name for name in self.graph.forward_edges(step_name)
+                               if name in self.graph and name != back_name)
+        max_prefetched_steps = self.adventure_settings.get('MAX_PREFETCHED_STEPS', DEFAULT_MAX_PREFETCHED_STEPS)
+        reachable_names = reachable_names[:max(max_prefetched_steps, 0)]
+
+        response['reachable_steps'] = {
+            name: self._render_step(name, cached_steps) for name in reachable_names
+        }
+        return response
+
+    def _render_navigation_response(self, submissions):
+        """
+        Render the json response of a navigation handler. The reachable steps are
+        included when the client asks for them with the `prefetch` flag.
+        """
+        cached_steps = self._get_cached_steps(submissions)
+        response = self._render_current_step(cached_steps)
+        if submissions and submissions.get('prefetch'):
+            self._add_reachable_steps(response, cached_steps)
+        return response
+
+    def _render_step_content(self, step_name):
+        """
+        Render the html and the ooyala players payload of a step.
+
+        Those don't depend on the student, so they are cached per content version, block
+        and language: the html holds the course URLs and the ooyala players name the block.
+        The step children are only loaded on a cache miss.
+        """
+        if self.step_cache is None:
+            return self._render_step_content_uncached(self._get_step_by_name(step_name))
+
+        return self.step_cache.get_or_create(
+            self.content_digest,
+            ('step', self.usage_key, step_name, get_language(), self.lazy_ooyala_players),
+            lambda: self._render_step_content_uncached(self._get_step_by_name(step_name)))
+
+    def _render_info_fragment(self):
+        """
+        Render the info child, or return None if there is none.
+
+        The fragment doesn't depend on the student, so it is cached per content version, block
+        (it holds the course URLs) and language. The children are only loaded on a cache miss.
+        """
+        if not self.has_info:
+            return None
+
+        def render():
+            return self.info.render(context={'as_template': False})
+
+        if self.step_cache is None:
+            return render()
+
+        fragment_data = self.step_cache.get_or_create(
+            self.content_digest, ('info', self.usage_key, get_language()), lambda: render().to_dict())
+        return Fragment.from_dict(fragment_data)
+
+    def _render_step_content_uncached(self, step):
+        """
+        Render the html and the ooyala players payload of a step, without cache.
+        """
+        with self.instrumentation.span('step_render'):
+            step_fragment = step.render()
+        xblocks = []
+        for child in step.ooyala_players:
+            if self.lazy_ooyala_players:
+                # Placeholder, the client fetches the player view with `fetch_xblock_view` when needed
+                xblocks.append({
+                    'id': child.name,
+                    'lazy': True,
+                    'data': {
+                        'step': step.name,
+                        'child': child.name
+                    }
+                })
+            else:
+                xblocks.append({
                     'id': child.name,
-                    'xblock': xblock
+                    'xblock': self._render_xblock_view(step, child)
                 })
 
-        return response
+        return {
+            'html': step_fragment.content,
+            'xblocks': xblocks,
+        }
+
+    def _render_xblock_view(self, step, child):
+        """
+        Render the options of the client-side xblock of an ooyala player child, whose
+        student view is then loaded through the `step` and `child` context of `student_view`.
+        """
+        with self.instrumentation.span('ooyala_view'):
+            xblock = child.xblock_view()
+        xblock['data'] = {
+            'step': step.name,
+            'child': child.name
+        }
+        return xblock
+
+    @lazy
+    def lazy_ooyala_players(self):
+        """
+        Returns True if the ooyala players are only rendered on demand, see the
+        `LAZY_OOYALA_PLAYERS` setting.
+        """
+        return bool(self.adventure_settings.get('LAZY_OOYALA_PLAYERS', False))
+
+    @lazy
+    def step_cache(self):
+        """
+        Returns the cache of rendered steps, configured with the `STEP_CACHE_BACKEND`
+        (`memory`, `django` or None), `STEP_CACHE_DJANGO_ALIAS`, `STEP_CACHE_TIMEOUT`
+        and `STEP_CACHE_SIZE` settings.
+        """
+        settings = self.adventure_settings
+        return get_render_cache(
+            backend=settings.get('STEP_CACHE_BACKEND', 'memory'),
+            django_alias=settings.get('STEP_CACHE_DJANGO_ALIAS', 'default'),
+            timeout=settings.get('STEP_CACHE_TIMEOUT'),
+            maxsize=settings.get('STEP_CACHE_SIZE', 1024),
+        )
 
     @property
-    def i18n_service(self):
-        """ Obtains translation service """
-        return self.runtime.service(self, "i18n")
+    def usage_key(self):
+        """
+        Returns the usage id of the block, as a string, which scopes its rendered content in the cache.
+        """
+        return str(self.scope_ids.usage_id)
 
     @property
+    def content_digest(self):
+        """
+        Returns the digest of the current `xml_content`, which identifies a content version.
+        """
+        return content_digest(self.xml_content)
+
+    @lazy
+    def adventure_settings(self):
+        """
+        Returns the adventure settings from the XBlock settings service, or an empty dict.
+        """
+        settings_service = self.runtime.service(self, "settings")
+        if settings_service is None:
+            return {}
+        return settings_service.get_settings_bucket(self) or {}
+
+    @lazy
+    def instrumentation(self):
+        """
+        Returns the instrumentation configured with the `INSTRUMENTATION` setting.
+        """
+        return get_instrumentation(self.adventure_settings.get('INSTRUMENTATION'))
+
+    @lazy
+    def i18n_service(self):
+        """
+        Obtains translation service, shared by all the blocks of the process for the
+        current language, see `get_i18n_service`.
+        """
+        return get_i18n_service(get_language(), lambda: self.runtime.service(self, "i18n"))
+
+    @lazy
+    def classified_children(self):
+        """
+        Returns the title, info and step children, found in one pass as an AdventureChildren.
+        """
+        # Imported on first use, which loading the children already requires
+        # pylint: disable=import-outside-toplevel
+        from mentoring.title import TitleBlock
+        from adventure.info import InfoBlock
+        from adventure.step import StepBlock
+
+        title, info, steps = None, None, []
+        for child in self.get_children_objects():
+            if isinstance(child, StepBlock):
+                steps.append(child)
+            elif isinstance(child, TitleBlock):
+                title = title or child
+            elif isinstance(child, InfoBlock):
+                info = info or child
+        return AdventureChildren(title, info, steps)
+
+    @lazy
     def title(self):
         """
         Returns the title child.
         """
-        for child in self.get_children_objects():
-            if isinstance(child, TitleBlock):
-                return child
-        return None
+        return self.classified_children.title
 
-    @property
+    @lazy
     def info(self):
         """
         Returns the info child.
         """
-        for child in self.get_children_objects():
-            if isinstance(child, InfoBlock):
-                return child
-        return None
+        return self.classified_children.info
 
     @lazy
     def steps(self):
         """
         Returns the step children.
         """
-        return [child for child in self.get_children_objects() if isinstance(child, StepBlock)]
+        return self.classified_children.steps
+
+    @lazy
+    def steps_by_name(self):
+        """
+        Returns the step children by name. On duplicated names, the first step wins.
+        """
+        steps_by_name = {}
+        for step in self.steps:
+            steps_by_name.setdefault(step.name, step)
+        return steps_by_name
+
+    @lazy
+    def graph(self):
+        """
+        Returns the compiled StepGraph of the adventure.
+
+        It is loaded from the `compiled_content` artifact when it matches the current
+        `xml_content`, without loading the children, and compiled from the steps otherwise.
+        """
+        artifact = self.compiled_artifact
+        if artifact is not None:
+            return StepGraph.from_artifact(artifact)
+        return StepGraph.from_steps(self.steps)
+
+    @lazy
+    def compiled_artifact(self):
+        """
+        Returns the `compiled_content` artifact if it matches the current `xml_content`, or None.
+        """
+        artifact = self.compiled_content
+        if (artifact and artifact.get('format') == ARTIFACT_FORMAT and
+                artifact.get('digest') == self.content_digest):
+            return artifact
+        return None
+
+    @lazy
+    def has_info(self):
+        """
+        Check if the adventure has an info child, from the compiled artifact when possible.
+        """
+        artifact = self.compiled_artifact
+        if artifact is not None and 'has_info' in artifact:
+            return artifact['has_info']
+        return self.info is not None
+
+    @lazy
+    def progress_table(self):
+        """
+        Returns the progress metrics of every step, see `compute_progress`.
+
+        They are computed once per content version and process.
+        """
+        return PROGRESS_TABLES.get_or_create(self.content_digest, lambda: compute_progress(self.graph))
+
+    @lazy
+    def reachable_step_names(self):
+        """
+        Returns the set of the names of the steps reachable from the first step.
+        """
+        return {name for name, progress in self.progress_table.items() if progress.min_from_first is not None}
 
     @lazy
     def has_steps(self):
         """
         Check if the adventure has steps configured.
         """
-        return len(self.steps) > 0
+        return len(self.graph) > 0
 
+    @instrumented('view.student_view')
     def student_view(self, context):
         fragment = Fragment()
 
@@ -351,38 +734,51 @@ class AdventureBlock(CompletableXBlockMixin, XBlockWithLightChildren):
         if not self.current_step_name and self.has_steps:
             self.current_step_name = 'first'
 
-        info_fragment = None
-        if self.info:
-            info_fragment = self.info.render(context={'as_template': False})
+        info_fragment = self._render_info_fragment()
 
-        fragment.add_content(loader.render_django_template(
-            'templates/html/adventure.html', {
-                'self': self,
-                'info_fragment': info_fragment,
-            }, i18n_service=self.i18n_service))
+        with self.instrumentation.span('template_render'):
+            fragment.add_content(loader.render_django_template(
+                'templates/html/adventure.html', {
+                    'self': self,
+                    'info_fragment': info_fragment,
+                }, i18n_service=self.i18n_service))
 
-        for css_url in CSS_URLS:
+        # The content-hashed bundles of `make bundle`, unless in `DEBUG_ASSETS` mode
+        bundles = None if self.adventure_settings.get('DEBUG_ASSETS') else load_manifest()
+        js_urls, css_urls = (bundles['js'], bundles['css']) if bundles else (JS_URLS, CSS_URLS)
+
+        for css_url in css_urls:
             fragment.add_css_url(self.runtime.local_resource_url(self, css_url))
 
-        for js_url in JS_URLS:
+        for js_url in js_urls:
             fragment.add_javascript_url(self.runtime.local_resource_url(self, js_url))
 
-        context = {}
-        for template in JS_TEMPLATES:
-            fragment.add_resource(
-                loader.render_js_template(
-                    template[1],
-                    element_id=template[0],
-                    context=context,
-                    i18n_service=self.i18n_service
-                ),
-                "text/html"
-            )
+        for js_template in self._render_js_templates():
+            fragment.add_resource(js_template, "text/html")
 
         fragment.initialize_js('AdventureBlock')
 
         return fragment
 
+    def _render_js_templates(self):
+        """
+        Render the client-side templates. They only depend on the language, so they
+        are rendered once per language and process.
+        """
+        def render():
+            with self.instrumentation.span('js_templates_render'):
+                return tuple(
+                    loader.render_js_template(
+                        template_path,
+                        element_id=element_id,
+                        context={},
+                        i18n_service=self.i18n_service
+                    )
+                    for element_id, template_path in JS_TEMPLATES
+                )
+
+        return JS_TEMPLATE_RESOURCES.get_or_create(get_language(), render)
+
     @property
     def additional_publish_event_data(self):
         return {
@@ -391,21 +787,54 @@ class AdventureBlock(CompletableXBlockMixin, XBlockWithLightChildren):
         }
 
     @XBlock.json_handler
+    @instrumented('handler.publish_events')
+    def publish_events(self, data, suffix=''):
+        """
+        Publish a batch of events at once. Each event is a dict with an `event_type`,
+        as accepted by the `publish_event` handler.
+        """
+        events = data.get('events') if isinstance(data, dict) else None
+        if not isinstance(events, list) or len(events) > MAX_EVENTS_PER_BATCH:
+            return {
+                'result': 'error',
+                'message': 'Expected a list of at most {} events'.format(MAX_EVENTS_PER_BATCH)
+            }
+
+        published = 0
+        for event in events:
+            if not isinstance(event, dict) or not event.get('event_type'):
+                log.warning('Invalid event for {}: {}'.format(self.adventure_id, event))
+                continue
+            event = dict(event)
+            result = self.publish_event_from_dict(event.pop('event_type'), event)
+            if result['result'] == 'success':
+                published += 1
+            else:
+                log.warning('Invalid event for {}: {}'.format(self.adventure_id, result['message']))
+
+        return {
+            'result': 'success',
+            'published': published
+        }
+
+    @XBlock.json_handler
+    @instrumented('handler.submit')
     def submit(self, submissions, suffix=''):
         log.debug('Received submissions for {}, step "{}":{}'.format(
             self.adventure_id, self.current_step_name, submissions))
 
-        current_step = self._get_current_step()
-        next_step_name = submissions['choice'] if 'choice' in submissions else None
-        next_step = self._get_next_step(next_step_name)
+        with self.instrumentation.span('step_lookup'):
+            current_step_name = self.current_step_name
+            choice = submissions['choice'] if 'choice' in submissions else None
+            next_step_name = self._get_next_step_name(choice)
 
-        if not current_step or not next_step:
+        if current_step_name not in self.graph or not next_step_name:
             return {
                 'result': 'error',
                 'message': 'Invalid next step. current_step_name: {}'.format(self.current_step_name)
             }
 
-        if not next_step_name and current_step.has_choices:
+        if not choice and self.graph.has_choices(current_step_name):
             return {
                 'result': 'error',
                 'message': 'Invalid submission. current_step_name: {}'.format(self.current_step_name)
@@ -413,39 +842,76 @@ class AdventureBlock(CompletableXBlockMixin, XBlockWithLightChildren):
 
         if 'choice' in submissions:
             self._save_student_choice(submissions)
-        self.current_step_name = next_step.name
-        self.emit_completion(1.0)
+        self.current_step_name = next_step_name
 
-        return self._render_current_step()
+        return self._render_navigation_response(submissions)
 
     @XBlock.json_handler
+    @instrumented('handler.fetch_current_step')
     def fetch_current_step(self, submissions, suffix=''):
         log.debug('Fetching current student step for {}, step "{}"'.format(
             self.adventure_id, self.current_step_name))
 
-        return self._render_current_step()
+        return self._render_current_step(self._get_cached_steps(submissions))
 
     @XBlock.json_handler
+    @instrumented('handler.prefetch_steps')
+    def prefetch_steps(self, submissions, suffix=''):
+        """
+        Returns the current step, along with the steps directly reachable from it.
+        """
+        log.debug('Prefetching student steps for {}, step "{}"'.format(
+            self.adventure_id, self.current_step_name))
+
+        cached_steps = self._get_cached_steps(submissions)
+        return self._add_reachable_steps(self._render_current_step(cached_steps), cached_steps)
+
+    @XBlock.json_handler
+    @instrumented('handler.fetch_xblock_view')
+    def fetch_xblock_view(self, submissions, suffix=''):
+        """
+        Returns the client-side xblock options of an ooyala player of the current step,
+        whose payload only holds a placeholder in the `LAZY_OOYALA_PLAYERS` mode.
+        """
+        step_name = submissions.get('step')
+        child_name = submissions.get('child')
+        step = self._get_step_by_name(step_name) if step_name == self.current_step_name else None
+        players = [child for child in step.ooyala_players if child.name == child_name] if step else []
+        if not players:
+            return {
+                'result': 'error',
+                'message': 'Invalid player. current_step_name: {}'.format(self.current_step_name)
+            }
+
+        return {
+            'result': 'success',
+            'xblock': self._render_xblock_view(step, players[0])
+        }
+
+    @XBlock.json_handler
+    @instrumented('handler.fetch_previous_step')
     def fetch_previous_step(self, submissions, suffix=''):
         log.debug('Fetching previous student step for {}, step "{}"'.format(
             self.adventure_id, self.current_step_name))
 
-        previous_step = self._get_previous_step()
-        if previous_step:
-            self.current_step_name = previous_step.name
+        previous_step_name = self.graph.back_edge(self.current_step_name)
+        if previous_step_name:
+            self.current_step_name = previous_step_name
 
-        return self._render_current_step()
+        return self._render_navigation_response(submissions)
 
     @XBlock.json_handler
+    @instrumented('handler.start_over')
     def start_over(self, submissions, suffix=''):
         log.debug('Start Over {}'.format(self.adventure_id))
 
-        while self.student_choices:
-            self.student_choices.pop()
+        self.student_choices = []
+        self.student_latest_choices.clear()
+        self.student_trajectory = []
 
         self.current_step_name = "first"
 
-        return self._render_current_step()
+        return self._render_navigation_response(submissions)
 
     def studio_view(self, context):
         """
@@ -466,31 +932,41 @@ class AdventureBlock(CompletableXBlockMixin, XBlockWithLightChildren):
         return fragment
 
     @XBlock.json_handler
+    @instrumented('handler.studio_submit')
     def studio_submit(self, submissions, suffix=''):
-        log.debug('Received studio submissions: {}'.format(submissions))
+        # Lazy formatting, not to copy large submissions when debug logging is disabled
+        log.debug('Received studio submissions: %s', submissions)
 
-        xml_content = submissions['xml_content']
+        # Only Studio needs the ingestion, and lxml
+        # pylint: disable=import-outside-toplevel
+        from lxml import etree
+        from adventure.ingestion import DEFAULT_MAX_STEPS, DEFAULT_MAX_XML_CONTENT_SIZE, ingest_xml_content
+
+        settings = self.adventure_settings
         try:
-            content = etree.parse(StringIO(xml_content))
-        except etree.XMLSyntaxError as e:
+            content = ingest_xml_content(
+                submissions['xml_content'],
+                max_size=settings.get('MAX_XML_CONTENT_SIZE', DEFAULT_MAX_XML_CONTENT_SIZE),
+                max_steps=settings.get('MAX_STEPS', DEFAULT_MAX_STEPS),
+            )
+        except (etree.XMLSyntaxError, ValueError) as e:
             response = {
                 'result': 'error',
                 'message': str(e)
             }
         else:
-            root = content.getroot()
-
-            try:
-                steps = root.findall('step')
-                self._validate_steps(steps)
-            except ValueError as e:
+            problems = validate_step_nodes(content.nodes, content.empty_mcq_steps)
+            errors = [problem for problem in problems if problem['severity'] == 'error']
+            if errors:
                 response = {
                     'result': 'error',
-                    'message': str(e)
+                    'message': ' '.join(error['message'] for error in errors),
+                    'problems': problems
                 }
             else:
                 response = {
-                    'result': 'success'
+                    'result': 'success',
+                    'problems': problems
                 }
 
                 # Fix to get the xblock initialized in edx/XBlock
@@ -498,7 +974,21 @@ class AdventureBlock(CompletableXBlockMixin, XBlockWithLightChildren):
                 if callable(adventure_id):
                     self.adventure_id = adventure_id()
 
-                self.xml_content = etree.tostring(content, encoding='unicode', pretty_print=True)
+                previous_digest = self.content_digest
+                self.xml_content = content.xml_content
+
+                child_summaries = {}
+                for node, summary in zip(content.nodes, content.child_summaries):
+                    child_summaries.setdefault(node.name, summary)
+                graph = StepGraph(content.nodes, child_summaries=child_summaries)
+                artifact = graph.to_artifact(self.content_digest)
+                artifact['has_info'] = content.has_info
+                artifact['root_attributes'] = content.root_attributes
+                self.compiled_content = artifact
+
+                if self.step_cache is not None:
+                    self.step_cache.invalidate(previous_digest)
+                    self.step_cache.invalidate(self.content_digest)
 
         log.debug('Response from Studio: {}'.format(response))
         return response
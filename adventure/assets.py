@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 edX
+#
+# This software's license gives you freedom; you can copy, convey,
+# propagate, redistribute and/or modify this program under the terms of
+# the GNU Affero General Public License (AGPL) as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version of the AGPL published by the FSF.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero
+# General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program in a file in the toplevel directory called
+# "AGPLv3".  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Bundles of the student view assets.
+
+`make bundle` concatenates the `JS_URLS` and the `CSS_URLS` into one JS and one CSS
+file, minified when `rjsmin` and `rcssmin` are installed, and named after a hash of
+their content, so that they can be cached forever. The bundle names are stored in
+`public/bundles/manifest.json`, read by the student view unless the `DEBUG_ASSETS`
+setting is set.
+
+Usage:
+
+    python -m adventure.assets
+"""
+
+# Imports ###########################################################
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sys
+
+from adventure.constants import CSS_URLS, JS_URLS
+
+# Globals ###########################################################
+
+log = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLES_DIR = 'public/bundles'
+MANIFEST_PATH = os.path.join(PACKAGE_DIR, BUNDLES_DIR, 'manifest.json')
+
+# Functions #########################################################
+
+
+def _read_assets(urls, separator):
+    contents = []
+    for url in urls:
+        with open(os.path.join(PACKAGE_DIR, url), encoding='utf-8') as asset_file:
+            contents.append(asset_file.read())
+    return separator.join(contents)
+
+
+def _minify(content, module_name, function_name):
+    """
+    Minify `content` with the `function_name` of the optional `module_name` package,
+    or returns it as is if it isn't installed.
+    """
+    try:
+        module = __import__(module_name)
+    except ImportError:
+        log.warning('%s is not installed, the bundle is not minified.', module_name)
+        return content
+    return getattr(module, function_name)(content)
+
+
+def _write_bundle(content, name, extension, bundles_dir):
+    digest = hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+    filename = '{}.{}.{}'.format(name, digest, extension)
+    with open(os.path.join(bundles_dir, filename), 'w', encoding='utf-8') as bundle_file:
+        bundle_file.write(content)
+    return '{}/{}'.format(BUNDLES_DIR, filename)
+
+
+def build_bundles(bundles_dir=os.path.join(PACKAGE_DIR, BUNDLES_DIR)):
+    """
+    Build the JS and CSS bundles of the student view, remove the outdated ones, and
+    write the manifest. Returns the manifest.
+    """
+    os.makedirs(bundles_dir, exist_ok=True)
+
+    # The separator ends the statements of files without a trailing semicolon
+    js = _minify(_read_assets(JS_URLS, '\n;\n'), 'rjsmin', 'jsmin')
+    css = _minify(_read_assets(CSS_URLS, '\n'), 'rcssmin', 'cssmin')
+    manifest = {
+        'js': [_write_bundle(js, 'adventure', 'js', bundles_dir)],
+        'css': [_write_bundle(css, 'adventure', 'css', bundles_dir)],
+    }
+
+    bundled = {os.path.basename(url) for url in manifest['js'] + manifest['css']}
+    for filename in os.listdir(bundles_dir):
+        if filename.startswith('adventure.') and filename not in bundled:
+            os.remove(os.path.join(bundles_dir, filename))
+
+    with open(os.path.join(bundles_dir, 'manifest.json'), 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    return manifest
+
+
+@functools.lru_cache(maxsize=1)
+def load_manifest():
+    """
+    Returns the manifest of the bundles, or None if they weren't built.
+    """
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (IOError, ValueError):
+        return None
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    manifest = build_bundles()
+    for url in manifest['js'] + manifest['css']:
+        print(url)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 edX
+#
+# This software's license gives you freedom; you can copy, convey,
+# propagate, redistribute and/or modify this program under the terms of
+# the GNU Affero General Public License (AGPL) as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version of the AGPL published by the FSF.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero
+# General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program in a file in the toplevel directory called
+# "AGPLv3".  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Imports ###########################################################
+
+import functools
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+# Globals ###########################################################
+
+log = logging.getLogger(__name__)
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# Functions #########################################################
+
+
+@functools.lru_cache(maxsize=256)
+def content_digest(content):
+    """
+    Returns a stable digest of a (unicode) content, used as a cache key.
+    """
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+# Classes ###########################################################
+
+
+class LRUCache(object):  # pylint: disable=useless-object-inheritance
+    """
+    A bounded, thread-safe, least recently used cache, with hit/miss counters.
+
+    Meant to be shared by all the blocks of a process.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for `key`, or `default`.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Caches `value` for `key`, evicting the least recently used entries if needed.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def get_or_create(self, key, factory):
+        """
+        Returns the value cached for `key`, calling `factory()` to compute it on a miss.
+
+        The factory is called outside of the lock, so concurrent misses on the same
+        key may compute the value more than once.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        """
+        Removes `key` from the cache, if present.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def resize(self, maxsize):
+        """
+        Changes the maximum number of entries of the cache.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        """
+        Empties the cache and resets the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Returns the cache statistics, as a CacheInfo.
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def _evict(self):
+        while len(self._data) > max(self.maxsize, 0):
+            self._data.popitem(last=False)
+
+
+class MemoryCacheBackend(object):  # pylint: disable=useless-object-inheritance
+    """
+    In-process cache backend, bounded by an LRUCache.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.lru = LRUCache(maxsize=maxsize)
+
+    def get(self, key):
+        return self.lru.get(key)
+
+    def set(self, key, value):
+        self.lru.set(key, value)
+
+
+class DjangoCacheBackend(object):  # pylint: disable=useless-object-inheritance
+    """
+    Cache backend using the Django cache framework, shared by all the processes.
+    """
+
+    def __init__(self, alias='default', timeout=None):
+        from django.core.cache import caches  # pylint: disable=import-outside-toplevel
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+
+class RenderCache(object):  # pylint: disable=useless-object-inheritance
+    """
+    Cache of rendered content, namespaced by content digest.
+
+    Every content digest has a version number stored in the backend, which is part of
+    the keys: invalidating a digest bumps its version, so the previous entries are
+    never served again and expire from the backend on their own.
+    """
+
+    def __init__(self, backend, prefix='adventure'):
+        self.backend = backend
+        self.prefix = prefix
+
+    def _version_key(self, digest):
+        return '{}:version:{}'.format(self.prefix, digest)
+
+    def _key(self, digest, parts):
+        """
+        Returns the key of `parts` in the `digest` namespace. The parts, which hold
+        author-chosen step names, are hashed to keep keys short and free of spaces, as
+        memcached requires.
+        """
+        version = self.backend.get(self._version_key(digest)) or 0
+        parts_digest = hashlib.sha1(json.dumps([str(part) for part in parts]).encode('utf-8')).hexdigest()
+        return ':'.join([self.prefix, digest, str(version), parts_digest])
+
+    def get(self, digest, parts):
+        """
+        Returns the value cached for `parts` in the `digest` namespace, or None.
+        """
+        return self.backend.get(self._key(digest, parts))
+
+    def set(self, digest, parts, value):
+        """
+        Caches `value` for `parts` in the `digest` namespace.
+        """
+        self.backend.set(self._key(digest, parts), value)
+
+    def get_or_create(self, digest, parts, factory):
+        """
+        Returns the value cached for `parts` in the `digest` namespace, calling
+        `factory()` to compute it on a miss.
+        """
+        key = self._key(digest, parts)
+        value = self.backend.get(key)
+        if value is None:
+            value = factory()
+            self.backend.set(key, value)
+        return value
+
+    def invalidate(self, digest):
+        """
+        Invalidates all the entries of the `digest` namespace.
+        """
+        version_key = self._version_key(digest)
+        self.backend.set(version_key, (self.backend.get(version_key) or 0) + 1)
+
+
+_render_caches = {}
+_render_caches_lock = threading.Lock()
+
+
+def get_render_cache(backend='memory', django_alias='default', timeout=None, maxsize=1024):
+    """
+    Returns the process-wide RenderCache for a backend name: `memory`, `django`, or
+    None to disable the cache.
+
+    Falls back to the `memory` backend when the Django cache framework is unavailable.
+    """
+    if not backend or backend == 'none':
+        return None
+
+    key = (backend, django_alias, timeout, maxsize)
+    with _render_caches_lock:
+        render_cache = _render_caches.get(key)
+        if render_cache is None:
+            if backend == 'django':
+                try:
+                    render_cache = RenderCache(DjangoCacheBackend(django_alias, timeout))
+                except Exception:  # pylint: disable=broad-except
+                    log.warning('Django cache "%s" unavailable, falling back to memory cache.', django_alias,
+                                exc_info=True)
+            if render_cache is None:
+                render_cache = RenderCache(MemoryCacheBackend(maxsize=maxsize))
+            _render_caches[key] = render_cache
+        return render_cache
@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 edX
+#
+# This software's license gives you freedom; you can copy, convey,
+# propagate, redistribute and/or modify this program under the terms of
+# the GNU Affero General Public License (AGPL) as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version of the AGPL published by the FSF.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero
+# General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program in a file in the toplevel directory called
+# "AGPLv3".  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Imports ###########################################################
+
+import logging
+from collections import deque, namedtuple
+from types import MappingProxyType
+
+# Globals ###########################################################
+
+log = logging.getLogger(__name__)
+
+StepNode = namedtuple('StepNode', ['name', 'back', 'next', 'choices'])
+
+# Version of the precompiled adventure artifacts, see `StepGraph.to_artifact`
+ARTIFACT_FORMAT = 1
+
+StepProgress = namedtuple('StepProgress', [
+    'min_from_first', 'max_from_first', 'min_to_end', 'max_to_end', 'fraction'
+])
+
+# Classes ###########################################################
+
+
+class StepGraph(object):  # pylint: disable=useless-object-inheritance
+    """
+    Immutable, compiled representation of the steps of an adventure.
+
+    Steps are indexed by name, and the forward edges (the `next` attribute
+    plus the MCQ choice values) and the `back` edges of every step are
+    computed once, so that all the navigation lookups are done in constant time.
+    """
+    __slots__ = ('_names', '_index', '_nodes', '_forward', '_child_summaries')
+
+    def __init__(self, nodes, child_summaries=None):
+        """
+        `nodes` is an iterable of StepNode, in the adventure order, and `child_summaries`
+        an optional mapping of step names to the number of children of each type
+        (`mcqs`, `ooyala_players` and `others`).
+        """
+        index = {}
+        nodes_by_name = {}
+        for node in nodes:
+            # On duplicated names, the first step wins
+            if node.name not in nodes_by_name:
+                index[node.name] = len(index)
+                nodes_by_name[node.name] = node
+
+        self._names = tuple(index)
+        self._index = MappingProxyType(index)
+        self._nodes = MappingProxyType(nodes_by_name)
+        self._child_summaries = MappingProxyType(dict(child_summaries or {}))
+
+        forward = {}
+        for node in nodes_by_name.values():
+            edges = [node.next] if node.next else []
+            edges.extend(choice for choice in node.choices if choice not in edges)
+            forward[node.name] = tuple(edges)
+        self._forward = MappingProxyType(forward)
+
+    @classmethod
+    def from_steps(cls, steps):
+        """
+        Compile the graph from a list of StepBlock objects.
+        """
+        nodes = [
+            StepNode(step.name, step.back, step.next, tuple(step.choice_values))
+            for step in steps
+        ]
+        steps_by_name = {}
+        for step in steps:
+            steps_by_name.setdefault(step.name, step)
+        child_summaries = {
+            name: {child_type: len(children) for child_type, children in step.classified_children._asdict().items()}
+            for name, step in steps_by_name.items()
+        }
+        return cls(nodes, child_summaries=child_summaries)
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """
+        Load the graph from a precompiled artifact, see `to_artifact`.
+        """
+        nodes = [StepNode(name, back, next_, tuple(choices)) for name, back, next_, choices in artifact['steps']]
+        child_summaries = {
+            node.name: summary for node, summary in zip(nodes, artifact['child_summaries']) if summary is not None
+        }
+        return cls(nodes, child_summaries=child_summaries)
+
+    def to_artifact(self, digest):
+        """
+        Returns the precompiled artifact of the graph, a JSON-serializable dict holding
+        the step table with the edges of every step and the child type summaries, for
+        the content of digest `digest`.
+        """
+        return {
+            'format': ARTIFACT_FORMAT,
+            'digest': digest,
+            'steps': [[node.name, node.back, node.next, list(node.choices)] for node in self._nodes.values()],
+            'child_summaries': [self._child_summaries.get(name) for name in self._names],
+        }
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def index_of(self, name):
+        """
+        Returns the position of a step in the adventure, or None.
+        """
+        return self._index.get(name)
+
+    def node(self, name):
+        """
+        Returns the StepNode of a step, or None.
+        """
+        return self._nodes.get(name)
+
+    def child_summary(self, name):
+        """
+        Returns the number of children of each type of a step, or None if unknown.
+        """
+        return self._child_summaries.get(name)
+
+    def has_choices(self, name):
+        """
+        Returns True if a step has an MCQ.
+        """
+        summary = self._child_summaries.get(name)
+        if summary is not None:
+            return summary['mcqs'] > 0
+        node = self._nodes.get(name)
+        return bool(node and node.choices)
+
+    def forward_edges(self, name):
+        """
+        Returns the names of the steps directly reachable going forward from a step.
+        """
+        return self._forward.get(name, ())
+
+    def back_edge(self, name):
+        """
+        Returns the name of the back step of a step, or None.
+        """
+        node = self._nodes.get(name)
+        if node is None or node.back not in self._index:
+            return None
+        return node.back
+
+    def is_terminal(self, name):
+        """
+        Returns True if a step is a final step: there is no way to go forward from it to
+        another step of the adventure, nor back.
+
+        This is the only definition of the final steps: the completion, the progress and
+        the validation of the adventures rely on it.
+        """
+        if name not in self._index or self.back_edge(name) is not None:
+            return False
+        return not any(target in self._index for target in self._forward[name])
+
+# Functions #########################################################
+
+
+def make_problem(code, message, steps=(), severity='error'):
+    """
+    Returns a problem of the adventure, as reported to Studio.
+    """
+    return {
+        'code': code,
+        'severity': severity,
+        'message': message,
+        'steps': list(steps),
+    }
+
+
+def _strongly_connected_components(names, successors):
+    """
+    Tarjan's algorithm, iterative. Returns the list of the strongly connected
+    components of the graph restricted to `names`.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in names:
+        if root in index:
+            continue
+        work = [(root, iter(successors(root)))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            name, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                if child in on_stack:
+                    lowlink[name] = min(lowlink[name], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[name])
+                if lowlink[name] == index[name]:
+                    components.append(_pop_component(stack, on_stack, name))
+    return components
+
+
+def _pop_component(stack, on_stack, root):
+    """
+    Pops the strongly connected component of `root` off the Tarjan's algorithm stack.
+    """
+    component = []
+    while True:
+        member = stack.pop()
+        on_stack.discard(member)
+        component.append(member)
+        if member == root:
+            return component
+
+
+def _transitions(graph):
+    """
+    Returns the names of the steps a student can go to from every step, forward or back.
+
+    The final steps (see `StepGraph.is_terminal`) are the steps without any transition.
+    """
+    transitions = {}
+    for name in graph:
+        transitions[name] = [target for target in graph.forward_edges(name) if target in graph]
+        back_name = graph.back_edge(name)
+        if back_name is not None and back_name not in transitions[name]:
+            transitions[name].append(back_name)
+    return transitions
+
+
+def analyze_graph(graph, first='first'):
+    """
+    Returns the navigation problems of an adventure, in O(V+E):
+
+    * steps which can't be reached from the first step,
+    * no final step (see `StepGraph.is_terminal`) can be reached from the first step,
+    * steps from which no final step can be reached, going forward or back, either
+      because they are part of a cycle without exit, or because they only lead to such cycles,
+    * `back` attributes pointing to steps which can't be reached.
+
+    References to unknown steps are ignored here, see `validate_step_nodes`.
+    Those problems don't prevent an adventure from working, so they are warnings.
+    """
+    successors_of = {
+        name: [target for target in graph.forward_edges(name) if target in graph] for name in graph
+    }
+    successors = successors_of.__getitem__
+    transitions_of = _transitions(graph)
+    transitions = transitions_of.__getitem__
+
+    problems = []
+    if first not in graph:
+        return problems
+
+    reachable = {first}
+    queue = [first]
+    while queue:
+        for target in successors(queue.pop()):
+            if target not in reachable:
+                reachable.add(target)
+                queue.append(target)
+
+    unreachable = [name for name in graph if name not in reachable]
+    if unreachable:
+        problems.append(make_problem(
+            'unreachable', 'Some steps can not be reached from the first step.', unreachable, 'warning'))
+
+    if not any(graph.is_terminal(name) for name in reachable):
+        problems.append(make_problem(
+            'no_final_step', 'No final step can be reached from the first step, so the adventure '
+            'can never be completed.', [], 'warning'))
+        problems.extend(_orphaned_backs_problems(graph, reachable))
+        return problems
+
+    predecessors = {name: [] for name in graph}
+    for name in graph:
+        for target in transitions(name):
+            predecessors[target].append(name)
+
+    can_end = {name for name in graph if graph.is_terminal(name)}
+    queue = list(can_end)
+    while queue:
+        for source in predecessors[queue.pop()]:
+            if source not in can_end:
+                can_end.add(source)
+                queue.append(source)
+
+    trapped = [name for name in graph if name in reachable and name not in can_end]
+    trapped_set = set(trapped)
+    in_cycle = set()
+    for component in _strongly_connected_components(
+            trapped, lambda name: [target for target in transitions(name) if target in trapped_set]):
+        if len(component) > 1 or component[0] in transitions(component[0]):
+            in_cycle.update(component)
+            problems.append(make_problem(
+                'cycle_without_exit', 'Some steps form a cycle which never leads to a final step.',
+                sorted(component, key=graph.index_of), 'warning'))
+
+    dead_ends = [name for name in trapped if name not in in_cycle]
+    if dead_ends:
+        problems.append(make_problem(
+            'no_path_to_end', 'Some steps only lead to cycles which never reach a final step.',
+            dead_ends, 'warning'))
+
+    problems.extend(_orphaned_backs_problems(graph, reachable))
+    return problems
+
+
+def _orphaned_backs_problems(graph, reachable):
+    orphaned_backs = [
+        name for name in graph
+        if graph.back_edge(name) is not None and graph.back_edge(name) not in reachable
+    ]
+    if not orphaned_backs:
+        return []
+    return [make_problem(
+        'unreachable_back_target', 'Some step "back" attributes point to steps which can not be reached.',
+        orphaned_backs, 'warning')]
+
+
+def validate_step_nodes(nodes, empty_mcq_steps=()):
+    """
+    Validate the steps of an adventure, in O(V+E), and returns all the problems found:
+
+    * All steps must have a "name" attribute.
+    * All step names must be unique.
+    * The first step name must be "first"
+    * All back attribute must be a valid step name.
+    * All next attribute must be a valid step name.
+    * All mcq must contain choices (`empty_mcq_steps` are the steps with an empty mcq).
+    * All mcq choice values must be a valid step name.
+
+    Those are errors. The warnings of `analyze_graph` are reported as well.
+    """
+    problems = []
+    names = set()
+    duplicated = []
+    missing_name_count = 0
+    for node in nodes:
+        if not node.name:
+            missing_name_count += 1
+        elif node.name in names:
+            duplicated.append(node.name)
+        names.add(node.name)
+
+    if missing_name_count:
+        problems.append(make_problem(
+            'missing_name', '{} step(s) have no "name" attribute.'.format(missing_name_count)))
+    if duplicated:
+        problems.append(make_problem('duplicated_name', 'All step names must be unique.', duplicated))
+
+    # TODO remove this constraint everywhere, use steps[0].name
+    if nodes and nodes[0].name != 'first':
+        problems.append(make_problem('first_step', 'The first step name must be "first"', [nodes[0].name]))
+
+    invalid_backs = [node.name for node in nodes if node.back is not None and node.back not in names]
+    if invalid_backs:
+        problems.append(make_problem(
+            'invalid_back', 'All step "back" attributes must be a valid step name.', invalid_backs))
+
+    invalid_nexts = [node.name for node in nodes if node.next is not None and node.next not in names]
+    if invalid_nexts:
+        problems.append(make_problem(
+            'invalid_next', 'All step "next" attributes must be a valid step name.', invalid_nexts))
+
+    if empty_mcq_steps:
+        problems.append(make_problem('empty_mcq', 'All mcq must contain choices.', empty_mcq_steps))
+
+    invalid_choices = [
+        node.name for node in nodes
+        if any(choice is None or choice not in names for choice in node.choices)
+    ]
+    if invalid_choices:
+        problems.append(make_problem(
+            'invalid_choice', 'All mcq choice values must be a valid step name.', invalid_choices))
+
+    problems.extend(analyze_graph(StepGraph(node for node in nodes if node.name)))
+    return problems
+
+
+def _breadth_first_distances(sources, successors):
+    distances = dict.fromkeys(sources, 0)
+    queue = deque(sources)
+    while queue:
+        name = queue.popleft()
+        for target in successors[name]:
+            if target not in distances:
+                distances[target] = distances[name] + 1
+                queue.append(target)
+    return distances
+
+
+def compute_progress(graph, first='first'):
+    """
+    Returns the progress table of an adventure, a dict of step names to StepProgress, in O(V+E).
+
+    For every step, it holds the shortest and longest number of transitions from the
+    first step and to a final step (see `StepGraph.is_terminal`), or None when there is
+    no such path, and the fraction of the adventure done on that step, based on the
+    shortest distances.
+
+    Transitions include the `back` ones. Longest distances ignore the transitions looping
+    back to a step already on the path.
+    """
+    successors = _transitions(graph)
+    predecessors = {name: [] for name in graph}
+    for name in graph:
+        for target in successors[name]:
+            predecessors[target].append(name)
+
+    min_from_first = _breadth_first_distances([first] if first in graph else [], successors)
+    min_to_end = _breadth_first_distances([name for name in graph if graph.is_terminal(name)], predecessors)
+
+    # Depth-first search dropping the edges which close a cycle: the remaining ones form
+    # a DAG, and the reversed post-order is one of its topological orders.
+    dag = {name: [] for name in graph}
+    post_order = []
+    done = set()
+    on_path = set()
+    for root in ([first] if first in graph else []) + list(graph):
+        if root in done:
+            continue
+        on_path.add(root)
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            name, children = stack[-1]
+            for child in children:
+                if child in done:
+                    dag[name].append(child)
+                elif child not in on_path:
+                    dag[name].append(child)
+                    on_path.add(child)
+                    stack.append((child, iter(successors[child])))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(name)
+                done.add(name)
+                post_order.append(name)
+
+    max_to_end = {}
+    for name in post_order:
+        if graph.is_terminal(name):
+            max_to_end[name] = 0
+        else:
+            distances = [max_to_end[child] for child in dag[name] if max_to_end[child] is not None]
+            max_to_end[name] = 1 + max(distances) if distances else None
+
+    max_from_first = {first: 0} if first in graph else {}
+    for name in reversed(post_order):
+        if name in max_from_first:
+            for child in dag[name]:
+                max_from_first[child] = max(max_from_first.get(child, 0), max_from_first[name] + 1)
+
+    table = {}
+    for name in graph:
+        from_first = min_from_first.get(name)
+        to_end = min_to_end.get(name)
+        fraction = None
+        if from_first is not None and to_end is not None:
+            fraction = float(from_first) / (from_first + to_end) if from_first + to_end else 1.0
+        table[name] = StepProgress(from_first, max_from_first.get(name), to_end, max_to_end[name], fraction)
+    return table
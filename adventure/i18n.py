@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 edX
+#
+# This software's license gives you freedom; you can copy, convey,
+# propagate, redistribute and/or modify this program under the terms of
+# the GNU Affero General Public License (AGPL) as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version of the AGPL published by the FSF.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero
+# General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program in a file in the toplevel directory called
+# "AGPLv3".  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Imports ###########################################################
+
+import logging
+
+from adventure.cache import LRUCache
+
+# Globals ###########################################################
+
+log = logging.getLogger(__name__)
+
+# Process-wide i18n services, which hold the translation catalogs, keyed by language
+I18N_SERVICES = LRUCache(maxsize=32)
+
+# Classes ###########################################################
+
+
+class MemoizedI18nService(object):  # pylint: disable=useless-object-inheritance
+    """
+    Wraps an i18n service, memoizing the translations of the static strings.
+
+    Other attributes are those of the wrapped service, so that the i18n template tags
+    can still merge its catalog.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self._translations = {}
+
+    def __getattr__(self, name):
+        if name == 'service':
+            raise AttributeError(name)
+        return getattr(self.service, name)
+
+    def ugettext(self, message):
+        translation = self._translations.get(message)
+        if translation is None:
+            translate = getattr(self.service, 'ugettext', None) or self.service.gettext
+            translation = self._translations[message] = translate(message)
+        return translation
+
+    gettext = ugettext
+
+# Functions #########################################################
+
+
+def get_language():
+    """
+    Returns the language of the current request, or an empty string.
+
+    Django translations are only imported on first use.
+    """
+    from django.utils import translation  # pylint: disable=import-outside-toplevel
+    return translation.get_language() or ''
+
+
+def get_i18n_service(language, factory):
+    """
+    Returns the process-wide i18n service of a language, created with `factory()`, and
+    so loaded, on first use.
+    """
+    def create():
+        service = factory()
+        return MemoizedI18nService(service) if service is not None else None
+
+    return I18N_SERVICES.get_or_create(language, create)
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 edX
+#
+# This software's license gives you freedom; you can copy, convey,
+# propagate, redistribute and/or modify this program under the terms of
+# the GNU Affero General Public License (AGPL) as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version of the AGPL published by the FSF.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero
+# General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program in a file in the toplevel directory called
+# "AGPLv3".  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Imports ###########################################################
+
+import logging
+from collections import namedtuple
+
+from lxml import etree
+
+from adventure.graph import StepNode
+
+# Globals ###########################################################
+
+log = logging.getLogger(__name__)
+
+# Default limits of a studio submission, see the `MAX_XML_CONTENT_SIZE`
+# and `MAX_STEPS` settings.
+DEFAULT_MAX_XML_CONTENT_SIZE = 5 * 1024 * 1024
+DEFAULT_MAX_STEPS = 10000
+
+# Size of the chunks fed to the parser
+CHUNK_SIZE = 64 * 1024
+
+IngestedContent = namedtuple('IngestedContent', [
+    'xml_content', 'nodes', 'empty_mcq_steps', 'child_summaries', 'has_info', 'root_attributes'
+])
+
+# Types of the step children, by tag, see `child_summary_from_element`
+CHILD_TYPES = {
+    'mcq': 'mcqs',
+    'ooyala-player': 'ooyala_players',
+}
+
+# Functions #########################################################
+
+
+def step_node_from_element(step):
+    """
+    Returns the StepNode of a `step` element, and whether it has an mcq without choices.
+    """
+    choices = ()
+    empty_mcq = False
+    mcq = step.find('mcq')
+    if mcq is not None:
+        choices = tuple(choice.attrib.get('value', None) for choice in mcq.findall('choice'))
+        empty_mcq = not choices
+    node = StepNode(step.attrib.get('name', ''), step.attrib.get('back', None),
+                    step.attrib.get('next', None), choices)
+    return node, empty_mcq
+
+
+def child_summary_from_element(step):
+    """
+    Returns the number of children of each type of a `step` element.
+    """
+    summary = {'mcqs': 0, 'ooyala_players': 0, 'others': 0}
+    for child in step:
+        if isinstance(child.tag, str):
+            summary[CHILD_TYPES.get(child.tag, 'others')] += 1
+    return summary
+
+
+def _root_tags(root):
+    """
+    Returns the opening and closing tags of the root element.
+    """
+    empty_root = etree.Element(root.tag, root.attrib, nsmap=root.nsmap)
+    empty_root.text = ''
+    serialized = etree.tostring(empty_root, encoding='unicode')
+    index = serialized.rindex('</')
+    return serialized[:index], serialized[index:]
+
+
+def _serialize_child(holder, element, root_tags, indent):
+    """
+    Returns the serialization of a top-level element detached from its root.
+
+    The element is serialized inside `holder`, an empty copy of the root, so that it
+    keeps the namespace context of the root instead of redeclaring its namespaces.
+    When `indent` is set, the element is pretty-printed and indented as a child of the
+    root, preceded by a newline.
+    """
+    opening_tag, closing_tag = root_tags
+    tail, element.tail = element.tail, None
+    holder.append(element)
+    serialized = etree.tostring(holder, encoding='unicode', pretty_print=indent)
+    holder.remove(element)
+    element.tail = tail
+    end = len(closing_tag) + 2 if indent else len(closing_tag)
+    return serialized[len(opening_tag):-end]
+
+
+def ingest_xml_content(xml_content, max_size=DEFAULT_MAX_XML_CONTENT_SIZE, max_steps=DEFAULT_MAX_STEPS):
+    """
+    Parse a submitted `xml_content` incrementally, and returns its canonical form
+    along with the StepNode and the child summary of its steps, as an IngestedContent.
+
+    Each top-level node is serialized and dropped from the tree as soon as it is
+    parsed, so only one of them is held in memory at a time. Like the pretty printer,
+    top-level nodes are indented when the root element has no text, and the comments
+    and processing instructions around the root element are kept on their own lines.
+
+    Raises a ValueError when the content exceeds `max_size` characters or `max_steps`
+    steps, and an etree.XMLSyntaxError when it isn't well-formed.
+    """
+    if max_size and len(xml_content) > max_size:
+        raise ValueError('The adventure is too large ({} characters, the maximum is {}).'.format(
+            len(xml_content), max_size))
+
+    parser = etree.XMLPullParser(events=('start', 'end', 'comment', 'pi'))
+    prologue = []
+    output = []
+    nodes = []
+    empty_mcq_steps = []
+    child_summaries = []
+    state = {'root': None, 'holder': None, 'root_tags': ('', ''), 'depth': 0, 'pending': None,
+             'root_text_written': False, 'indent': False, 'has_info': False, 'root_attributes': []}
+
+    def flush_pending():
+        root = state['root']
+        if not state['root_text_written']:
+            output.append(root.text or '')
+            state['root_text_written'] = True
+            state['indent'] = root.text is None
+        pending = state['pending']
+        if pending is not None:
+            # Like the pretty printer, keeps the formatting of the children of a root with text
+            output.append(_serialize_child(state['holder'], pending, state['root_tags'], state['indent']))
+            output.append(pending.tail or '')
+            state['pending'] = None
+
+    def handle_events():
+        for event, element in parser.read_events():
+            if event == 'start':
+                state['depth'] += 1
+                if state['depth'] == 1:
+                    state['root'] = element
+                    state['root_attributes'] = [list(item) for item in element.items()]
+                    state['holder'] = etree.Element(element.tag, nsmap=element.nsmap)
+                    state['root_tags'] = _root_tags(state['holder'])
+                    output.append(_root_tags(element)[0])
+                elif state['depth'] == 2:
+                    flush_pending()
+            elif event in ('comment', 'pi'):
+                if state['depth'] == 1:
+                    flush_pending()
+                    state['pending'] = element
+                elif state['depth'] == 0:
+                    serialized = etree.tostring(element, encoding='unicode', with_tail=False)
+                    if state['root'] is None:
+                        prologue.append(serialized + '\n')
+                    else:
+                        output.append('\n' + serialized)
+            else:
+                state['depth'] -= 1
+                if state['depth'] == 1:
+                    if element.tag == 'step':
+                        node, empty_mcq = step_node_from_element(element)
+                        nodes.append(node)
+                        child_summaries.append(child_summary_from_element(element))
+                        if empty_mcq:
+                            empty_mcq_steps.append(node.name)
+                        if max_steps and len(nodes) > max_steps:
+                            raise ValueError('The adventure has too many steps (the maximum is {}).'.format(
+                                max_steps))
+                    elif element.tag == 'info':
+                        state['has_info'] = True
+                    state['pending'] = element
+                elif state['depth'] == 0:
+                    flush_pending()
+                    if len(output) == 2 and not output[1]:
+                        # Empty root element
+                        output[:] = [etree.tostring(etree.Element(element.tag, element.attrib, nsmap=element.nsmap),
+                                                    encoding='unicode')]
+                    else:
+                        closing_tag = state['root_tags'][1]
+                        output.append('\n' + closing_tag if state['indent'] else closing_tag)
+
+    for start in range(0, len(xml_content), CHUNK_SIZE):
+        parser.feed(xml_content[start:start + CHUNK_SIZE])
+        handle_events()
+    parser.close()
+    handle_events()
+
+    return IngestedContent(''.join(prologue + output) + '\n', nodes, empty_mcq_steps, child_summaries,
+                           state['has_info'], state['root_attributes'])
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 edX
+#
+# This software's license gives you freedom; you can copy, convey,
+# propagate, redistribute and/or modify this program under the terms of
+# the GNU Affero General Public License (AGPL) as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version of the AGPL published by the FSF.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Affero
+# General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program in a file in the toplevel directory called
+# "AGPLv3".  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Opt-in timing of the adventure hot paths.
+
+Instrumentation is configured with the `INSTRUMENTATION` XBlock setting of the
+AdventureBlock, for instance:
+
+    'INSTRUMENTATION': {
+        'sink': 'logging',      # or 'memory', or the dotted path of a callable(name, duration_ms)
+        'prefix': 'adventure',
+    }
+
+Without this setting, spans are no-ops.
+"""
+
+# Imports ###########################################################
+
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+
+# Globals ###########################################################
+
+log = logging.getLogger(__name__)
+
+# Classes ###########################################################
+
+
+class LoggingSink(object):  # pylint: disable=useless-object-inheritance
+    """
+    Logs the duration of every span.
+    """
+
+    def __init__(self, logger=log, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, name, duration_ms):
+        self.logger.log(self.level, '%s took %.3f ms', name, duration_ms)
+
+
+class MemorySink(object):  # pylint: disable=useless-object-inheritance
+    """
+    Keeps the durations of the spans in memory, mainly for tests.
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, name, duration_ms):
+        with self._lock:
+            self.durations[name].append(duration_ms)
+
+    def clear(self):
+        with self._lock:
+            self.durations.clear()
+
+
+class _NullSpan(object):  # pylint: disable=useless-object-inheritance
+    """
+    Span of a disabled instrumentation, which does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span(object):  # pylint: disable=useless-object-inheritance
+    """
+    Times the code it wraps, and reports the duration to a sink.
+    """
+    __slots__ = ('sink', 'name', 'start')
+
+    def __init__(self, sink, name):
+        self.sink = sink
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.sink(self.name, (time.perf_counter() - self.start) * 1000)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Failed to report the "%s" span.', self.name)
+        return False
+
+
+class NullInstrumentation(object):  # pylint: disable=useless-object-inheritance
+    """
+    Disabled instrumentation.
+    """
+    enabled = False
+    sink = None
+
+    def span(self, name):  # pylint: disable=unused-argument
+        return NULL_SPAN
+
+
+class Instrumentation(object):  # pylint: disable=useless-object-inheritance
+    """
+    Reports named spans to a sink, a callable taking the span name and its duration in ms.
+    """
+    enabled = True
+
+    def __init__(self, sink, prefix='adventure'):
+        self.sink = sink
+        self.prefix = prefix
+
+    def span(self, name):
+        """
+        Returns a context manager timing the `name` span.
+        """
+        return _Span(self.sink, '{}.{}'.format(self.prefix, name) if self.prefix else name)
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+# Functions #########################################################
+
+_instrumentations = {}
+_instrumentations_lock = threading.Lock()
+
+
+def _get_sink(sink):
+    if sink == 'logging':
+        return LoggingSink()
+    if sink == 'memory':
+        return MemorySink()
+    if callable(sink):
+        return sink
+
+    from django.utils.module_loading import import_string  # pylint: disable=import-outside-toplevel
+    return import_string(sink)
+
+
+def get_instrumentation(config):
+    """
+    Returns the process-wide instrumentation for the `INSTRUMENTATION` setting `config`.
+    """
+    if not config or not config.get('sink'):
+        return NULL_INSTRUMENTATION
+
+    key = (repr(config.get('sink')), config.get('prefix', 'adventure'))
+    with _instrumentations_lock:
+        instrumentation = _instrumentations.get(key)
+        if instrumentation is None:
+            try:
+                sink = _get_sink(config['sink'])
+            except ImportError:
+                log.exception('Invalid instrumentation sink, instrumentation disabled.')
+                instrumentation = NULL_INSTRUMENTATION
+            else:
+                instrumentation = Instrumentation(sink, prefix=config.get('prefix', 'adventure'))
+            _instrumentations[key] = instrumentation
+        return instrumentation
+
+
+def instrumented(name):
+    """
+    Decorator timing a method of a block with an `instrumentation` attribute, as the `name` span.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.span(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
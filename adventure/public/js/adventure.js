@@ -47,6 +47,19 @@ function AdventureEditBlock(runtime, element) {
     var xmlEditorTextarea = $('.block-xml-editor', element),
         xmlEditor = CodeMirror.fromTextArea(xmlEditorTextarea[0], { mode: 'xml' });
 
+    // Display all the problems of a submission at once
+    function showProblems(title, problems) {
+        var list = $('<ul class="problems"></ul>');
+        $.each(problems, function(index, problem) {
+            var text = problem.message;
+            if (problem.steps.length) {
+                text += ' (' + problem.steps.join(', ') + ')';
+            }
+            list.append($('<li></li>').addClass(problem.severity).text(text));
+        });
+        $('.error-message', element).empty().append($('<span></span>').text(title), list);
+    }
+
     $('.save-button', element).bind('click', function() {
         var handlerUrl = runtime.handlerUrl(element, 'studio_submit'),
             data = {
@@ -55,8 +68,13 @@ function AdventureEditBlock(runtime, element) {
 
         $('.error-message', element).html();
         $.post(handlerUrl, JSON.stringify(data)).done(function(response) {
-            if (response.result === 'success') {
+            var problems = response.problems || [];
+            if (response.result === 'success' && !problems.length) {
                 window.location.reload(false);
+            } else if (response.result === 'success') {
+                showProblems('Saved, with warnings:', problems);
+            } else if (problems.length) {
+                showProblems('Error:', problems);
             } else {
                 $('.error-message', element).html('Error: '+response.message);
             }
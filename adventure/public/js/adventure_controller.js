@@ -3,13 +3,21 @@ var AdventureController = Backbone.Marionette.Controller.extend({
     initialize: function(options) {
         this.app = options.app;
         this.runtime = options.runtime;
+        this.currentStep = null;
+        this.reachableSteps = {};
+        // Step contents (html and xblocks) seen so far, for the content version `contentVersion`
+        this.contentVersion = null;
+        this.stepCache = {};
+        // Promise of the navigations queued so far, resolved once the server answered them all
+        this.pendingNavigation = null;
         this._createFunctionAliases();
-        _.bindAll(this, 'showNextStep', 'showPreviousStep', 'showStep', 'startOver');
+        _.bindAll(this, 'showNextStep', 'showPreviousStep', 'showStep', 'startOver', 'getXBlockOptions');
         this.registerHandlers();
     },
 
     /* Create the following function aliases, which are variants of _fetchStep
      * _fetchCurrentStep
+     * _prefetchSteps
      * _fetchNextStep
      * _fetchPreviousStep
      * _startOver
@@ -20,6 +28,11 @@ var AdventureController = Backbone.Marionette.Controller.extend({
             this.runtime.handlerUrl(this.app.container, 'fetch_current_step')
         );
 
+        this._prefetchSteps = _.partial(
+            this._fetchStep,
+            this.runtime.handlerUrl(this.app.container, 'prefetch_steps')
+        );
+
         this._fetchNextStep = _.partial(
             this._fetchStep,
             this.runtime.handlerUrl(this.app.container, 'submit')
@@ -40,7 +53,49 @@ var AdventureController = Backbone.Marionette.Controller.extend({
         this.app.vent.on("show:next:step", this.showNextStep);
         this.app.vent.on("show:previous:step", this.showPreviousStep);
         this.app.vent.on("start:over", this.startOver);
+        this.app.reqres.setHandler("xblockOptions", this.getXBlockOptions);
+    },
+
+    /* Returns a promise of the options of a step xblock, fetching them from the
+     * server for lazy xblocks. Waits for the pending navigation, as the xblock
+     * view is only served for the current step of the student.
+     */
+    getXBlockOptions: function(xblock) {
+        var self = this;
+        var defer = $.Deferred();
 
+        $.when(this.pendingNavigation).always(function() {
+            if (!xblock.lazy) {
+                defer.resolve(_.clone(xblock.xblock));
+                return;
+            }
+            var url = self.runtime.handlerUrl(self.app.container, 'fetch_xblock_view');
+            $.post(url, JSON.stringify(xblock.data)).done(function(data) {
+                if (data.result == 'error') {
+                    console.error("Failed to fetch xblock: " + data.message);
+                    defer.reject();
+                }
+                else {
+                    defer.resolve(data.xblock);
+                }
+            }).fail(function() {
+                console.error("Failed to fetch xblock.");
+                defer.reject();
+            });
+        });
+
+        return defer.promise();
+    },
+
+    /* Returns the complete payload of a step received from the server, filling
+     * the content of `not_modified` steps from the step cache, and caching the others.
+     */
+    _resolveStep: function(step) {
+        if (step.not_modified) {
+            return _.extend({}, step, this.stepCache[step.name]);
+        }
+        this.stepCache[step.name] = {html: step.html, xblocks: step.xblocks};
+        return step;
     },
 
     // Fetch previous current and next steps on th server
@@ -49,7 +104,10 @@ var AdventureController = Backbone.Marionette.Controller.extend({
         var self = this;
         var defer = $.Deferred();
         var promise = defer.promise();
-        var data = data || {};
+        var data = _.extend({
+            version: this.contentVersion,
+            cached_steps: _.keys(this.stepCache)
+        }, data || {});
 
         $.post(url, JSON.stringify(data)).done(function(data) {
             if (data.result == 'error') {
@@ -57,7 +115,16 @@ var AdventureController = Backbone.Marionette.Controller.extend({
                 defer.reject();
             }
             else {
-                defer.resolve(data.step);
+                if (data.version !== self.contentVersion) {
+                    self.contentVersion = data.version;
+                    self.stepCache = {};
+                }
+                if (data.reachable_steps) {
+                    self.reachableSteps = _.object(_.map(data.reachable_steps, function(step, name) {
+                        return [name, self._resolveStep(step)];
+                    }));
+                }
+                defer.resolve(self._resolveStep(data.step));
             }
         }).fail(function() {
             console.error("Failed to fetch step.");
@@ -80,8 +147,56 @@ var AdventureController = Backbone.Marionette.Controller.extend({
         this._changeNavigationRegion(new AdventureNavigationView({app: this.app}));
     },
 
+    /* Show the prefetched step named `stepName` right away, if any, while the
+     * server confirms the navigation `request`. The server response wins if it
+     * differs from the prefetched step.
+     */
+    _navigate: function(request, stepName) {
+        var self = this;
+        var prefetchedStep = stepName ? this.reachableSteps[stepName] : null;
+
+        this.reachableSteps = {};
+        if (prefetchedStep) {
+            this.showStep(prefetchedStep);
+        }
+
+        request.done(function(step) {
+            if (!prefetchedStep || step.name !== prefetchedStep.name) {
+                self.showStep(step);
+            }
+        }).fail(function() {
+            if (prefetchedStep) {
+                // resync with the server state
+                self.showCurrentStep();
+            }
+        });
+        return request;
+    },
+
+    /* Run the navigation `navigate`, a function returning the navigation request, once
+     * the server answered the previous navigations: the server checks every navigation
+     * against the step the previous one led to.
+     */
+    _queueNavigation: function(navigate) {
+        var self = this;
+        var previous = this.pendingNavigation;
+        var defer = $.Deferred();
+        var pending = defer.promise();
+
+        this.pendingNavigation = pending;
+        $.when(previous).always(function() {
+            navigate().always(function() {
+                if (self.pendingNavigation === pending) {
+                    self.pendingNavigation = null;
+                }
+                defer.resolve();
+            });
+        });
+    },
+
     showStep: function(step_data) {
         var step = new AdventureStepModel(step_data);
+        this.currentStep = step;
         var options = {
             'app': this.app,
             'model': step
@@ -91,19 +206,30 @@ var AdventureController = Backbone.Marionette.Controller.extend({
     },
 
     showCurrentStep: function() {
-        this._fetchCurrentStep().done(this.showStep);
+        this._prefetchSteps().done(this.showStep);
     },
 
     showNextStep: function() {
+        var self = this;
         var data = this.app.request('stepData');
-        this._fetchNextStep(data).done(this.showStep);
+        var nextStep = this.currentStep && this.currentStep.get('next_step');
+        this._queueNavigation(function() {
+            return self._navigate(self._fetchNextStep(_.extend({prefetch: true}, data)), data.choice || nextStep);
+        });
     },
 
     showPreviousStep: function() {
-        this._fetchPreviousStep().done(this.showStep);
+        var self = this;
+        var stepName = this.currentStep && this.currentStep.get('back_step');
+        this._queueNavigation(function() {
+            return self._navigate(self._fetchPreviousStep({prefetch: true}), stepName);
+        });
     },
 
     startOver: function() {
-        this._startOver().done(this.showStep);
+        var self = this;
+        this._queueNavigation(function() {
+            return self._navigate(self._startOver({prefetch: true}), 'first');
+        });
     }
 });
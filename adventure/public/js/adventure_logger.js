@@ -1,8 +1,15 @@
 var AdventureLogger = Backbone.Marionette.Controller.extend({
+    // Events are queued and published in batches, after FLUSH_DELAY ms,
+    // when MAX_QUEUE_SIZE events are queued, or when the page is hidden.
+    FLUSH_DELAY: 2000,
+    MAX_QUEUE_SIZE: 10,
+
     initialize: function(options) {
         this.app = options.app;
         this.runtime = options.runtime;
         this.element = options.element;
+        this.queue = [];
+        this.flushTimer = null;
         this.registerHandlers();
     },
 
@@ -16,6 +23,20 @@ var AdventureLogger = Backbone.Marionette.Controller.extend({
         this.app.vent.on("start:over", this.logStartedOver);
 
         $('video').on('playing', this.logVideoStarted);
+
+        _.bindAll(this, 'flush', 'onPageHide', 'onVisibilityChange');
+        $(window).on('pagehide', this.onPageHide);
+        $(document).on('visibilitychange', this.onVisibilityChange);
+    },
+
+    onPageHide: function() {
+        this.flush(true);
+    },
+
+    onVisibilityChange: function() {
+        if (document.visibilityState === 'hidden') {
+            this.flush(true);
+        }
     },
 
     logVideoStarted: function() {
@@ -31,8 +52,7 @@ var AdventureLogger = Backbone.Marionette.Controller.extend({
             step: step_name
         });
 
-        var is_final_step = !(step.get("has_next_step") || step.get("has_choices"));
-        if (is_final_step) {
+        if (step.get("is_final_step")) {
             this._publish_event({event_type: "xblock.adventure.final-step-shown"});
         };
     },
@@ -58,10 +78,56 @@ var AdventureLogger = Backbone.Marionette.Controller.extend({
     },
 
     _publish_event: function(data) {
+        this.queue.push(data);
+        if (this.queue.length >= this.MAX_QUEUE_SIZE) {
+            this.flush();
+        }
+        else if (!this.flushTimer) {
+            this.flushTimer = setTimeout(this.flush, this.FLUSH_DELAY);
+        }
+    },
+
+    // Publish the queued events in a single request. When the page is going away,
+    // use a keepalive fetch, which survives the page unload.
+    flush: function(unloading) {
+        if (this.flushTimer) {
+            clearTimeout(this.flushTimer);
+            this.flushTimer = null;
+        }
+        if (!this.queue.length) {
+            return;
+        }
+
+        var url = this.runtime.handlerUrl(this.element, 'publish_events');
+        var data = JSON.stringify({events: this.queue});
+        this.queue = [];
+
+        if (unloading === true && window.fetch) {
+            // Unlike a beacon, it can send the CSRF token header
+            fetch(url, {
+                method: 'POST',
+                keepalive: true,
+                credentials: 'same-origin',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': this._getCookie('csrftoken')
+                },
+                body: data
+            });
+            return;
+        }
         $.ajax({
             type: "POST",
-            url: this.runtime.handlerUrl(this.element, 'publish_event'),
-            data: JSON.stringify(data)
+            url: url,
+            data: data
+        });
+    },
+
+    _getCookie: function(name) {
+        var prefix = name + '=';
+        var cookie = _.find(document.cookie.split(';'), function(cookie) {
+            return $.trim(cookie).indexOf(prefix) === 0;
         });
+        return cookie ? decodeURIComponent($.trim(cookie).substring(prefix.length)) : '';
     }
 });
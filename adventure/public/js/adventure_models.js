@@ -1,9 +1,13 @@
 var AdventureStepModel = Backbone.Model.extend({
     defaults: {
         name: '',
+        back_step: null,
+        next_step: null,
         has_back_step: false,
         has_next_step: false,
+        is_final_step: false,
         can_start_over: false,
+        not_modified: false,
         html: '',
         has_choices: false,
         xblocks: [],
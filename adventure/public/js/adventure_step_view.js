@@ -2,7 +2,8 @@ var AdventureStepView = Backbone.Marionette.LayoutView.extend({
     template: "#adventure-step-view-template",
 
     ui: {
-        'choices': '.choices .choices-list'
+        'choices': '.choices .choices-list',
+        'loadXBlockButton': '.load-xblock'
     },
 
     events: {
@@ -12,6 +13,7 @@ var AdventureStepView = Backbone.Marionette.LayoutView.extend({
     initialize: function(options) {
         this.app = options.app;
         _.bindAll(this, 'getData', 'onChoiceSelect');
+        this.observers = [];
         this.registerHandlers();
         this.initializeXBlockRegions();
     },
@@ -27,21 +29,65 @@ var AdventureStepView = Backbone.Marionette.LayoutView.extend({
         /* TODO refactoring: do not initialize the xblock like this, create a common XBlockView */
         var self = this;
         _.each(this.model.get('xblocks'), function(xblock) {
-            var options = xblock;
-            if (!self.model.get('is_studio')) {
-                options.xblock.useCurrentHost = true;
-                $('#'+options.id, self.el).xblock(options.xblock);
+            var el = $('#' + xblock.id, self.el);
+            if (self.model.get('is_studio')) {
+                el.html('<p>Ooyala-player child will be displayed in the LMS.</p>');
+            }
+            else if (xblock.lazy) {
+                self.loadXBlockOnDemand(el, xblock);
             }
             else {
-                $('#'+options.id, self.el).html(
-                    '<p>Ooyala-player child will be displayed in the LMS.</p>'
-                );
+                self.loadXBlock(el, xblock);
             }
         });
 
         this.selectStudentChoice();
     },
 
+    onDestroy: function() {
+        _.invoke(this.observers, 'disconnect');
+        this.observers = [];
+    },
+
+    loadXBlock: function(el, xblock) {
+        this.app.request('xblockOptions', xblock).done(function(options) {
+            options.useCurrentHost = true;
+            el.xblock(options);
+        });
+    },
+
+    /* Show a placeholder instead of a lazy xblock, which is only loaded once
+     * it scrolls into view or its placeholder is clicked.
+     */
+    loadXBlockOnDemand: function(el, xblock) {
+        var self = this;
+        var observer = null;
+        var loaded = false;
+        var load = function() {
+            if (loaded) {
+                return;
+            }
+            loaded = true;
+            if (observer) {
+                observer.disconnect();
+            }
+            el.empty();
+            self.loadXBlock(el, xblock);
+        };
+
+        el.empty().append(this.ui.loadXBlockButton.clone().prop('hidden', false).one('click', load));
+
+        if ('IntersectionObserver' in window) {
+            observer = new IntersectionObserver(function(entries) {
+                if (_.some(entries, function(entry) { return entry.isIntersecting; })) {
+                    load();
+                }
+            });
+            observer.observe(el[0]);
+            this.observers.push(observer);
+        }
+    },
+
     registerHandlers: function() {
         this.app.reqres.setHandler("stepData", this.getData);
     },
@@ -23,9 +23,12 @@
 
 # Imports ###########################################################
 
+import functools
 import logging
+from collections import namedtuple
 
-from ooyala_player.ooyala_player import OoyalaPlayerLightChildBlock
+from lazy import lazy
+from xblock.plugin import PluginMissingError
 
 from mentoring.light_children import LightChild, Scope, String
 from mentoring.mcq import MCQBlock
@@ -36,6 +39,22 @@ from adventure.utils import loader
 
 log = logging.getLogger(__name__)
 
+StepChildren = namedtuple('StepChildren', ['mcqs', 'ooyala_players', 'others'])
+
+# Functions #########################################################
+
+
+@functools.lru_cache(maxsize=1)
+def _ooyala_player_class():
+    """
+    Returns the class of the ooyala player light children, loaded from its light child
+    entry point, or None if the ooyala player isn't installed.
+    """
+    try:
+        return LightChild.load_class('ooyala-player')
+    except PluginMissingError:
+        return None
+
 # Classes ###########################################################
 
 
@@ -59,43 +78,80 @@ class StepBlock(LightChild, StepParentMixin):
         context = context or {}
         context['as_template'] = False
 
-        fragment, children = self.get_step_fragment_children(context)
-        fragment.add_content(loader.render_template('templates/html/step.html', {
-            'self': self,
-            'children': children
-        }))
+        instrumentation = self.xblock_container.instrumentation
+        with instrumentation.span('step_children'):
+            fragment, children = self.get_step_fragment_children(context)
+        with instrumentation.span('template_render'):
+            fragment.add_content(loader.render_template('templates/html/step.html', {
+                'self': self,
+                'children': children
+            }))
         return self.xblock_container.fragment_text_rewriting(fragment)
 
+    @lazy
+    def classified_children(self):
+        """
+        Returns the children of the step, classified as a StepChildren. The ooyala player
+        entry point is only looked up for the steps which may have an ooyala player.
+
+        The step children only change with the content, so do the light children of
+        the adventure, which are rebuilt for every content version.
+        """
+        mcqs, others = [], []
+        for child in self.get_children_objects():
+            if isinstance(child, MCQBlock):
+                mcqs.append(child)
+            else:
+                others.append(child)
+
+        ooyala_players = []
+        ooyala_player_class = _ooyala_player_class() if others and self._may_have_ooyala_players() else None
+        if ooyala_player_class is not None:
+            ooyala_players = [child for child in others if isinstance(child, ooyala_player_class)]
+            others = [child for child in others if not isinstance(child, ooyala_player_class)]
+        return StepChildren(mcqs, ooyala_players, others)
+
+    def _may_have_ooyala_players(self):
+        """
+        Returns False if the child summary of the compiled artifact says the step has no
+        ooyala player, so the ooyala player entry point doesn't need to be looked up.
+        """
+        adventure = self.xblock_container
+        if adventure.compiled_artifact is None or adventure.steps_by_name.get(self.name) is not self:
+            # Without an artifact the graph is compiled from the steps, and duplicated
+            # names only have the summary of their first step
+            return True
+        summary = adventure.graph.child_summary(self.name)
+        return summary is None or summary['ooyala_players'] > 0
+
     @property
     def has_choices(self):
         """
         Returns True if the current_step has choices.
         """
+        return bool(self.classified_children.mcqs)
 
-        choices = [child for child in self.get_children_objects() if isinstance(child, MCQBlock)]
-
-        return bool(choices)
+    @property
+    def choice_values(self):
+        """
+        Returns the values of the MCQ choices, which are the names of the steps they lead to.
+        """
+        return [choice.value for child in self.classified_children.mcqs for choice in child.custom_choices]
 
     @property
     def ooyala_players(self):
         """
         Returns the ooyala players child.
         """
-
-        ooyala_players = [child for child in self.get_children_objects()
-                          if isinstance(child, OoyalaPlayerLightChildBlock)]
-
-        return ooyala_players
+        return self.classified_children.ooyala_players
 
     def get_step_fragment_children(self, context=None):
         children = []
 
-        ooyala_children = {}
-        for child in self.get_children_objects():
-            ooyala_children[child.name] = bool(isinstance(child, OoyalaPlayerLightChildBlock))
+        ooyala_names = {child.name for child in self.classified_children.ooyala_players}
 
         fragment, named_children = self.get_children_fragment(context)
         for name, child in named_children:
-            children.append((name, child, ooyala_children[name]))
+            children.append((name, child, name in ooyala_names))
 
         return (fragment, children)
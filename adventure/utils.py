@@ -21,19 +21,111 @@
 # "AGPLv3".  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import importlib
 import logging
-import os
-from io import BytesIO as StringIO
+import pkgutil
+import threading
 
-import pkg_resources
-from django.template import Context, Template
 from web_fragments.fragment import Fragment
-from xblockutils.resources import ResourceLoader
 
 log = logging.getLogger(__name__)
 
+# Template tags providing the i18n service translations to the templates, moved
+# to the XBlock package along with the rest of xblockutils
+I18N_TEMPLATETAGS = ['xblock.utils.templatetags.i18n', 'xblockutils.templatetags.i18n']
 
-loader = ResourceLoader(__name__)
+
+class CachingResourceLoader(object):  # pylint: disable=useless-object-inheritance
+    """
+    Loads the resources of a module, like xblockutils' ResourceLoader, but compiles
+    each Django template once per process.
+
+    The compiled templates are shared by all the blocks: only the rendering, with a
+    new context, happens on every call. Django templates are only imported on first use.
+    """
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self._engine = None
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        """
+        Returns the Django template engine, created on first use, once Django is configured.
+        """
+        if self._engine is None:
+            # pylint: disable=import-outside-toplevel
+            from django.template import Engine
+            from django.template.backends.django import get_installed_libraries
+
+            libraries = get_installed_libraries()
+            for module_name in I18N_TEMPLATETAGS:
+                try:
+                    importlib.import_module(module_name)
+                except ImportError:
+                    continue
+                libraries['i18n'] = module_name
+                break
+            self._engine = Engine(libraries=libraries)
+        return self._engine
+
+    def load_unicode(self, resource_path):
+        """
+        Gets the content of a resource.
+        """
+        return pkgutil.get_data(self.module_name, resource_path).decode('utf-8')
+
+    def get_template(self, template_path):
+        """
+        Returns the compiled template of a resource, from the cache.
+        """
+        template = self._templates.get(template_path)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(template_path)
+                if template is None:
+                    from django.template import Template  # pylint: disable=import-outside-toplevel
+                    template = Template(self.load_unicode(template_path), engine=self.engine)
+                    self._templates[template_path] = template
+        return template
+
+    def clear(self):
+        """
+        Drops the compiled templates, for instance after the template files changed.
+        """
+        with self._lock:
+            self._templates = {}
+            self._engine = None
+
+    def render_django_template(self, template_path, context=None, i18n_service=None):
+        """
+        Renders a Django template resource with `context`, translated with `i18n_service`.
+        """
+        from django.template import Context  # pylint: disable=import-outside-toplevel
+
+        context = context or {}
+        context['_i18n_service'] = i18n_service
+        return self.get_template(template_path).render(Context(context))
+
+    def render_template(self, template_path, context=None):
+        """
+        Renders a Django template resource with `context`.
+        """
+        return self.render_django_template(template_path, context)
+
+    def render_js_template(self, template_path, element_id, context=None, i18n_service=None):
+        """
+        Renders a Django template resource as a client-side template, with the `element_id` id.
+        """
+        return "<script type='text/template' id='{}'>\n{}\n</script>".format(
+            element_id,
+            self.render_django_template(template_path, context or {}, i18n_service)
+        )
+
+
+loader = CachingResourceLoader(__name__)
 
 
 class XBlockWithChildrenFragmentsMixin(object):  # pylint: disable=useless-object-inheritance
@@ -25,6 +25,7 @@
 import os
 
 from setuptools import setup
+from setuptools.command.build_py import build_py
 
 # Functions #########################################################
 
@@ -39,6 +40,16 @@ def package_data(pkg, root_list):
     return {pkg: data}
 
 
+class BuildPyWithBundles(build_py):
+    """Build the student view bundles along with the package, see `adventure/assets.py`."""
+
+    def run(self):
+        build_py.run(self)
+        if not self.dry_run:
+            from adventure.assets import BUNDLES_DIR, build_bundles  # pylint: disable=import-outside-toplevel
+            build_bundles(os.path.join(self.build_lib, 'adventure', BUNDLES_DIR))
+
+
 BLOCKS = [
     'adventure = adventure.adventure:AdventureBlock',
 ]
@@ -63,4 +74,5 @@ setup(
         'xblock.light_children': BLOCKS_CHILDREN,
     },
     package_data=package_data("adventure", ["templates", "public"]),
+    cmdclass={'build_py': BuildPyWithBundles},
 )
@@ -0,0 +1,80 @@
+"""
+Generators of synthetic adventures, used by the benchmarks.
+
+Every generator returns the `xml_content` of an adventure of `size` steps, whose
+first step is named "first".
+"""
+
+
+def _step_name(index):
+    return 'first' if index == 0 else 'step{}'.format(index)
+
+
+def _step_xml(index, back=None, next_=None, choices=()):
+    attributes = ['name="{}"'.format(_step_name(index))]
+    if back is not None:
+        attributes.append('back="{}"'.format(_step_name(back)))
+    if next_ is not None:
+        attributes.append('next="{}"'.format(_step_name(next_)))
+
+    lines = ['  <step {}>'.format(' '.join(attributes))]
+    lines.append('    <html><p>Content of step {}.</p></html>'.format(index))
+    if choices:
+        lines.append('    <mcq type="choices">')
+        lines.append('      <question>Where to go from step {}?</question>'.format(index))
+        for choice in choices:
+            lines.append('      <choice value="{0}">Go to {0}</choice>'.format(_step_name(choice)))
+        lines.append('    </mcq>')
+    lines.append('  </step>')
+    return '\n'.join(lines)
+
+
+def _adventure_xml(steps):
+    return '\n'.join([
+        '<adventure display_name="Benchmark adventure">',
+        '  <title>Benchmark adventure</title>',
+        '  <info>Synthetic adventure generated for the benchmarks.</info>',
+    ] + steps + ['</adventure>'])
+
+
+def linear_adventure(size):
+    """
+    Each step leads to the following one with its `next` attribute, and back to the previous one,
+    except the last one, which is the final step.
+    """
+    return _adventure_xml([
+        _step_xml(
+            i,
+            back=i - 1 if 0 < i < size - 1 else None,
+            next_=i + 1 if i < size - 1 else None,
+        )
+        for i in range(size)
+    ])
+
+
+def fanout_adventure(size):
+    """
+    The first step is an MCQ leading to every other step, which are all final steps.
+    """
+    steps = [_step_xml(0, choices=range(1, size))]
+    steps.extend(_step_xml(i) for i in range(1, size))
+    return _adventure_xml(steps)
+
+
+def branching_adventure(size):
+    """
+    The steps form a binary tree of MCQs, each step leading back to its parent, except the
+    leaves, which are the final steps.
+    """
+    steps = []
+    for i in range(size):
+        choices = [child for child in (2 * i + 1, 2 * i + 2) if child < size]
+        steps.append(_step_xml(i, back=(i - 1) // 2 if i > 0 and choices else None, choices=choices))
+    return _adventure_xml(steps)
+
+
+SHAPES = {
+    'linear': linear_adventure,
+    'fanout': fanout_adventure,
+    'branching': branching_adventure,
+}
@@ -0,0 +1,157 @@
+"""
+Latency benchmark of the AdventureBlock handlers, on synthetic adventures.
+
+Every request builds a new block, as the LMS does, on top of an in-memory runtime
+whose field data persists between requests.
+
+Usage:
+
+    python -m tests.benchmarks.bench_handlers --output handlers.json
+    python -m tests.benchmarks.bench_handlers --compare handlers.json --output new.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from tests.benchmarks.adventures import SHAPES
+from tests.utils import AdventureSession, setup_django
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+HANDLERS = ['fetch_current_step', 'submit', 'fetch_previous_step', 'start_over', 'studio_submit']
+
+
+class BenchmarkSession(AdventureSession):
+    """
+    A student going through an adventure, so that every request exercises a valid transition.
+    """
+
+    def next_submission(self):
+        """
+        Returns the data of a `submit` going forward from the current step, or None on a final step.
+        """
+        block = self.new_block()
+        step_name = self.step['name'] if self.step else block.current_step_name or 'first'
+        if self.step and self.step['has_choices']:
+            return {'choice': block.graph.forward_edges(step_name)[-1]}
+        if block.graph.node(step_name).next:
+            return {}
+        return None
+
+    def request_data(self, handler_name):
+        """
+        Returns the data of the next `handler_name` request, moving the student through
+        the adventure so that every request exercises a valid transition.
+        """
+        if handler_name == 'submit':
+            submission = self.next_submission()
+            if submission is None:
+                self.call('start_over')
+                submission = self.next_submission()
+            return submission
+        if handler_name == 'fetch_previous_step' and not (self.step and self.step['has_back_step']):
+            submission = self.next_submission()
+            if submission is None:
+                self.call('start_over')
+                submission = self.next_submission()
+            self.call('submit', submission)
+        if handler_name == 'studio_submit':
+            return {'xml_content': self.xml_content}
+        return {}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def benchmark_handler(session, handler_name, iterations, allocation_samples):
+    """
+    Returns the latency and allocation statistics of `iterations` calls to a handler.
+    """
+    durations = []
+    for _ in range(iterations):
+        data = session.request_data(handler_name)
+        start = time.perf_counter()
+        session.call(handler_name, data)
+        durations.append((time.perf_counter() - start) * 1000)
+
+    peaks = []
+    for _ in range(allocation_samples):
+        data = session.request_data(handler_name)
+        tracemalloc.start()
+        session.call(handler_name, data)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': percentile(durations, 0.5),
+        'p99_ms': percentile(durations, 0.99),
+        'mean_ms': statistics.mean(durations),
+        'alloc_peak_kib': statistics.mean(peaks) if peaks else None,
+    }
+
+
+def run(shapes, sizes, iterations, allocation_samples):
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            session = BenchmarkSession(SHAPES[shape](size))
+            session.call('fetch_current_step')
+            for handler_name in HANDLERS:
+                result = benchmark_handler(session, handler_name, iterations, allocation_samples)
+                result.update({'shape': shape, 'size': size, 'handler': handler_name})
+                results.append(result)
+                print('{shape:>10} {size:>6} {handler:<20} p50 {p50_ms:9.2f} ms  p99 {p99_ms:9.2f} ms'.format(
+                    **result))
+    return results
+
+
+def compare(results, baseline_results):
+    """
+    Prints the p50/p99 ratios of `results` against a previous run.
+    """
+    baseline = {(r['shape'], r['size'], r['handler']): r for r in baseline_results}
+    for result in results:
+        previous = baseline.get((result['shape'], result['size'], result['handler']))
+        if previous is None:
+            continue
+        print('{shape:>10} {size:>6} {handler:<20} p50 x{p50:5.2f}  p99 x{p99:5.2f}'.format(
+            p50=result['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else float('nan'),
+            p99=result['p99_ms'] / previous['p99_ms'] if previous['p99_ms'] else float('nan'),
+            **result))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapes', nargs='+', default=sorted(SHAPES), choices=sorted(SHAPES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--allocation-samples', type=int, default=5)
+    parser.add_argument('--output', help='JSON file to store the results in')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare the results with')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    results = run(args.shapes, args.sizes, args.iterations, args.allocation_samples)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            compare(results, json.load(baseline_file)['results'])
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({
+                'python': platform.python_version(),
+                'timestamp': time.time(),
+                'results': results,
+            }, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Import-time benchmark of the `xblock.v1` entry point of the package.
+
+Every run imports the entry point module in a new interpreter with `python -X importtime`,
+and reports the total import time along with the slowest modules.
+
+Usage:
+
+    python -m tests.benchmarks.bench_import --output import.json
+    python -m tests.benchmarks.bench_import --compare import.json --output new.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# `xblock.v1` entry point of setup.py
+ENTRY_POINT = 'adventure.adventure:AdventureBlock'
+
+
+def import_times(statement):
+    """
+    Runs `statement` in a new interpreter, and returns the cumulative import time of
+    every module it imported, in microseconds, by module name, along with the names
+    of the modules imported at the top level.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE, universal_newlines=True, check=False,
+    )
+    if process.returncode:
+        raise RuntimeError('Failed to run "{}":\n{}'.format(statement, process.stderr))
+
+    times = {}
+    top_level = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level
+        if len(name) - len(name.lstrip()) == 1:
+            top_level.add(name.strip())
+        times[name.strip()] = int(cumulative)
+    return times, top_level
+
+
+def run(entry_point, iterations, top):
+    """
+    Returns the median import time of the entry point module and of its slowest imports,
+    in ms, leaving out the modules imported by the interpreter startup.
+    """
+    module_name = entry_point.split(':')[0]
+    _, startup_modules = import_times('pass')
+
+    totals = []
+    modules = {}
+    for _ in range(iterations):
+        times, top_level = import_times('import {}'.format(module_name))
+        totals.append(sum(times[name] for name in top_level - startup_modules) / 1000)
+        for name, cumulative in times.items():
+            if name not in startup_modules:
+                modules.setdefault(name, []).append(cumulative / 1000)
+
+    slowest = sorted(modules.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:top]
+    return {
+        'entry_point': entry_point,
+        'iterations': iterations,
+        'total_ms': statistics.median(totals),
+        'modules_ms': {name: statistics.median(values) for name, values in slowest},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entry-point', default=ENTRY_POINT)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--top', type=int, default=20, help='number of slowest modules to report')
+    parser.add_argument('--output', help='JSON file to store the results in')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare the results with')
+    args = parser.parse_args(argv)
+
+    result = run(args.entry_point, args.iterations, args.top)
+    print('{entry_point}: {total_ms:.1f} ms'.format(**result))
+    for name, duration in result['modules_ms'].items():
+        print('  {:<60} {:9.1f} ms'.format(name, duration))
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['result']
+        print('x{:.2f} compared to {:.1f} ms'.format(result['total_ms'] / baseline['total_ms'], baseline['total_ms']))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({
+                'python': platform.python_version(),
+                'timestamp': time.time(),
+                'result': result,
+            }, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
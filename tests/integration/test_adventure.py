@@ -7,6 +7,7 @@ from .base_test import AdventureBaseTest
     'adventure.adventure.JS_URLS',
     ['public/js/vendor/underscore-min.js', 'public/js/vendor/backbone-min.js'] + JS_URLS
 )
+@patch('adventure.adventure.load_manifest', lambda: None)
 class TestSeleniumTest(AdventureBaseTest):
     def assert_hidden(self, elem):
         self.assertFalse(elem.is_displayed())
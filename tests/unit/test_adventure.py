@@ -0,0 +1,252 @@
+from unittest import TestCase, mock
+
+import pytest
+
+from tests.utils import AdventureSession, setup_django
+
+# The block derives from the mentoring light children
+pytest.importorskip('mentoring')
+
+# "third" is a dead end, the student has to go back from it
+XML_CONTENT = """<adventure>
+  <step name="first">
+    <html><p>First step.</p></html>
+    <mcq name="first-mcq" type="choices">
+      <question>Where to go?</question>
+      <choice value="second">Second</choice>
+      <choice value="last">Last</choice>
+    </mcq>
+  </step>
+  <step name="second" back="first">
+    <html><p>Second step.</p></html>
+    <mcq name="second-mcq" type="choices">
+      <question>Where to go?</question>
+      <choice value="third">Third</choice>
+      <choice value="last">Last</choice>
+    </mcq>
+  </step>
+  <step name="third" back="second">
+    <html><p>Third step.</p></html>
+  </step>
+  <step name="last">
+    <html><p>Last step.</p></html>
+  </step>
+</adventure>"""
+
+
+class AdventureBlockTest(TestCase):
+    adventure_settings = None
+
+    def setUp(self):
+        setup_django()
+        self.session = AdventureSession(XML_CONTENT, adventure_settings=self.adventure_settings)
+        self.call('fetch_current_step')
+
+    def call(self, handler_name, data=None):
+        response = self.session.call(handler_name, data)
+        self.assertEqual(response['result'], 'success', response)
+        return response
+
+    def choose(self, choice):
+        return self.call('submit', {'choice': choice})
+
+
+class TestLatestChoices(AdventureBlockTest):
+    def test_latest_choices(self):
+        self.assertEqual(self.session.step['name'], 'first')
+        self.assertEqual(self.choose('second')['step']['name'], 'second')
+        self.assertEqual(self.choose('third')['step']['name'], 'third')
+        self.assertEqual(self.call('fetch_previous_step')['step']['name'], 'second')
+        self.assertEqual(self.session.step['student_choice'], 'third')
+        self.assertEqual(self.session.new_block().student_latest_choices, {'first': 'second', 'second': 'third'})
+
+    def test_migrate_student_choices(self):
+        block = self.session.new_block()
+        block.current_step_name = 'first'
+        block.student_choices = [{'step': 'first', 'choice': 'last'}, {'step': 'first', 'choice': 'second'}]
+        block.save()
+
+        self.assertEqual(self.call('fetch_current_step')['step']['student_choice'], 'second')
+
+        block = self.session.new_block()
+        self.assertEqual(block.student_choices, [])
+        self.assertEqual(block.student_latest_choices, {'first': 'second'})
+
+
+class TestTrajectory(AdventureBlockTest):
+    adventure_settings = {'TRAJECTORY_RETENTION': 2}
+
+    def test_migrate_student_choices(self):
+        block = self.session.new_block()
+        block.student_choices = [{'step': 'first', 'choice': 'last'}, {'step': 'first', 'choice': 'second'}]
+        block.save()
+
+        self.call('fetch_current_step')
+
+        block = self.session.new_block()
+        self.assertEqual(block.student_trajectory, [[0, 3], [0, 1]])
+        self.assertEqual(block.student_choice_count, 2)
+
+    def test_trajectory_retention(self):
+        self.choose('second')
+        self.choose('third')
+        self.call('fetch_previous_step')
+        self.call('fetch_previous_step')
+        self.choose('last')
+
+        block = self.session.new_block()
+        self.assertEqual(block.student_latest_choices, {'first': 'last', 'second': 'third'})
+        self.assertEqual(block.student_trajectory, [[1, 2], [0, 3]])
+        self.assertEqual(block.student_choice_count, 3)
+
+    def test_start_over(self):
+        self.choose('second')
+        self.choose('third')
+        self.assertEqual(self.call('start_over')['step']['name'], 'first')
+
+        block = self.session.new_block()
+        self.assertEqual(block.current_step_name, 'first')
+        self.assertEqual(block.student_latest_choices, {})
+        self.assertEqual(block.student_trajectory, [])
+        self.assertIsNone(self.session.step['student_choice'])
+
+
+class TestNoTrajectory(AdventureBlockTest):
+    adventure_settings = {'TRAJECTORY_RETENTION': 0}
+
+    def test_choices_without_trajectory(self):
+        self.choose('second')
+        block = self.session.new_block()
+        self.assertEqual(block.student_latest_choices, {'first': 'second'})
+        self.assertEqual(block.student_trajectory, [])
+        self.assertEqual(block.student_choice_count, 1)
+
+
+class TestPrefetching(AdventureBlockTest):
+    def test_invalid_choice(self):
+        for choice in ('third', 'unknown'):
+            self.assertEqual(self.session.call('submit', {'choice': choice})['result'], 'error')
+        self.assertEqual(self.session.new_block().current_step_name, 'first')
+
+    def test_reachable_steps(self):
+        response = self.call('submit', {'choice': 'second', 'prefetch': True})
+        self.assertEqual(set(response['reachable_steps']), {'first', 'third', 'last'})
+        self.assertEqual(response['reachable_steps']['third']['name'], 'third')
+        self.assertNotIn('reachable_steps', self.choose('third'))
+
+
+class TestPrefetchingLimit(AdventureBlockTest):
+    adventure_settings = {'MAX_PREFETCHED_STEPS': 1}
+
+    def test_back_step_first(self):
+        self.choose('second')
+        self.assertEqual(list(self.call('prefetch_steps')['reachable_steps']), ['first'])
+
+
+class TestPublishEvents(AdventureBlockTest):
+    def test_publish_events(self):
+        response = self.call('publish_events', {'events': [
+            {'event_type': 'xblock.adventure.step-shown', 'step': 'first'},
+            {'event_type': 'xblock.adventure.went-forward'},
+            {'step': 'first'},
+            'xblock.adventure.went-backward',
+            {'event_type': 'xblock.adventure.started-over', 'user_id': 'someone-else'},
+        ]})
+        self.assertEqual(response['published'], 2)
+
+        block = self.session.new_block()
+        self.assertEqual(self.session.runtime.events, [
+            ('xblock.adventure.step-shown', dict(block.additional_publish_event_data, step='first')),
+            ('xblock.adventure.went-forward', block.additional_publish_event_data),
+        ])
+
+    def test_invalid_batch(self):
+        for data in ({'events': [{'event_type': 'xblock.adventure.went-forward'}] * 101}, {'events': 'all'}, {}):
+            self.assertEqual(self.session.call('publish_events', data)['result'], 'error')
+        self.assertEqual(self.session.runtime.events, [])
+
+
+class TestTerminalReachedCompletion(AdventureBlockTest):
+    def test_completion(self):
+        self.choose('second')
+        third = self.choose('third')['step']
+        self.assertFalse(third['is_final_step'])
+        self.assertEqual(self.session.completions, [])
+
+        self.call('fetch_previous_step')
+        self.assertTrue(self.choose('last')['step']['is_final_step'])
+        self.call('fetch_current_step')
+        self.assertEqual(self.session.completions, [1.0])
+
+
+class TestFirstStepVisitedCompletion(AdventureBlockTest):
+    adventure_settings = {'COMPLETION_MODE': 'first-step-visited'}
+
+    def test_completion(self):
+        self.choose('last')
+        self.assertEqual(self.session.completions, [1.0])
+
+
+class TestAllStepsVisitedCompletion(AdventureBlockTest):
+    adventure_settings = {'COMPLETION_MODE': 'all-steps-visited'}
+
+    def test_completion(self):
+        self.choose('last')
+        self.call('start_over')
+        self.choose('second')
+        self.assertEqual(self.session.completions, [])
+
+        self.choose('third')
+        self.assertEqual(self.session.completions, [1.0])
+
+
+class TestProgressCompletion(AdventureBlockTest):
+    adventure_settings = {'COMPLETION_MODE': 'progress'}
+
+    def test_completion(self):
+        self.assertEqual(self.session.step['progress']['fraction'], 0.0)
+        self.choose('second')
+        self.assertEqual(self.choose('third')['step']['progress']['fraction'], 0.5)
+        self.call('fetch_previous_step')
+        self.assertEqual(self.session.completions, [0.5])
+
+        self.choose('last')
+        self.call('start_over')
+        self.assertEqual(self.session.completions, [0.5, 1.0])
+
+
+class TestRootAttributes(TestCase):
+    def setUp(self):
+        setup_django()
+        self.xml_content = XML_CONTENT.replace('<adventure>', '<adventure display_name="Meeting with Mary">')
+        self.session = AdventureSession(self.xml_content)
+
+    def test_without_artifact(self):
+        block = self.session.new_block()
+        self.assertEqual(block.display_name, 'Meeting with Mary')
+
+    def test_from_artifact(self):
+        self.assertEqual(self.session.call('studio_submit', {'xml_content': self.xml_content})['result'], 'success')
+        block = self.session.new_block()
+        self.assertEqual(block.display_name, 'Meeting with Mary')
+        # The children are only loaded when needed
+        self.assertIsNone(block._light_children)  # pylint: disable=protected-access
+
+
+class TestOoyalaPlayerLookup(TestCase):
+    def setUp(self):
+        setup_django()
+        self.session = AdventureSession(XML_CONTENT)
+
+    def classify_children(self):
+        with mock.patch('adventure.step._ooyala_player_class', return_value=None) as lookup:
+            for step in self.session.new_block().steps:
+                step.classified_children  # pylint: disable=pointless-statement
+        return lookup
+
+    def test_without_artifact(self):
+        self.assertTrue(self.classify_children().called)
+
+    def test_steps_without_player(self):
+        self.assertEqual(self.session.call('studio_submit', {'xml_content': XML_CONTENT})['result'], 'success')
+        self.assertFalse(self.classify_children().called)
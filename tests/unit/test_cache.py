@@ -0,0 +1,92 @@
+from unittest import TestCase
+
+from adventure import cache
+from adventure.cache import CacheInfo, DjangoCacheBackend, LRUCache, MemoryCacheBackend, RenderCache, get_render_cache
+from tests.utils import setup_django
+
+
+class TestLRUCache(TestCase):
+    def test_eviction(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('c', 3)
+        # "b" is the least recently used entry
+        self.assertNotIn('b', lru)
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+        self.assertEqual(len(lru), 2)
+
+    def test_resize(self):
+        lru = LRUCache(maxsize=3)
+        for key in 'abc':
+            lru.set(key, key)
+        lru.resize(1)
+        self.assertEqual(len(lru), 1)
+        self.assertIn('c', lru)
+        lru.resize(0)
+        self.assertEqual(len(lru), 0)
+        lru.set('d', 'd')
+        self.assertNotIn('d', lru)
+
+    def test_counters(self):
+        lru = LRUCache(maxsize=2)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.get_or_create('a', lambda: 1), 1)
+        self.assertEqual(lru.get_or_create('a', lambda: 2), 1)
+        self.assertEqual(lru.get('a', 0), 1)
+        self.assertEqual((lru.hits, lru.misses), (2, 2))
+        lru.clear()
+        self.assertEqual((lru.hits, lru.misses, len(lru)), (0, 0, 0))
+
+    def test_info(self):
+        lru = LRUCache(maxsize=4)
+        lru.set('a', 1)
+        lru.get('a')
+        lru.get('b')
+        self.assertEqual(lru.info(), CacheInfo(hits=1, misses=1, maxsize=4, currsize=1))
+
+
+class TestRenderCache(TestCase):
+    def setUp(self):
+        self.render_cache = RenderCache(MemoryCacheBackend())
+
+    def test_namespaces(self):
+        self.render_cache.set('digest', ['step', 'first'], 'first')
+        self.assertEqual(self.render_cache.get('digest', ['step', 'first']), 'first')
+        self.assertIsNone(self.render_cache.get('other', ['step', 'first']))
+        self.assertIsNone(self.render_cache.get('digest', ['step', 'second']))
+
+    def test_invalidate(self):
+        self.render_cache.set('digest', ['step'], 'before')
+        self.render_cache.set('other', ['step'], 'other')
+        self.render_cache.invalidate('digest')
+        self.assertIsNone(self.render_cache.get('digest', ['step']))
+        self.assertEqual(self.render_cache.get('other', ['step']), 'other')
+        self.assertEqual(self.render_cache.get_or_create('digest', ['step'], lambda: 'after'), 'after')
+        self.assertEqual(self.render_cache.get_or_create('digest', ['step'], lambda: 'again'), 'after')
+
+
+class TestGetRenderCache(TestCase):
+    def setUp(self):
+        setup_django()
+        cache._render_caches.clear()  # pylint: disable=protected-access
+
+    def test_disabled(self):
+        self.assertIsNone(get_render_cache(None))
+        self.assertIsNone(get_render_cache('none'))
+
+    def test_shared(self):
+        render_cache = get_render_cache('memory', maxsize=8)
+        self.assertIs(get_render_cache('memory', maxsize=8), render_cache)
+        self.assertIsNot(get_render_cache('memory', maxsize=16), render_cache)
+        self.assertEqual(get_render_cache('memory', maxsize=16).backend.lru.maxsize, 16)
+
+    def test_django(self):
+        self.assertIsInstance(get_render_cache('django').backend, DjangoCacheBackend)
+
+    def test_django_fallback(self):
+        with self.assertLogs('adventure.cache', 'WARNING'):
+            render_cache = get_render_cache('django', django_alias='missing', maxsize=8)
+        self.assertIsInstance(render_cache.backend, MemoryCacheBackend)
+        self.assertEqual(render_cache.backend.lru.maxsize, 8)
@@ -0,0 +1,155 @@
+from unittest import TestCase
+
+from adventure.graph import StepGraph, StepNode, analyze_graph, compute_progress, validate_step_nodes
+
+
+def node(name, back=None, next_=None, choices=()):
+    return StepNode(name, back, next_, tuple(choices))
+
+
+def problems_by_code(problems):
+    return {problem['code']: problem for problem in problems}
+
+
+class TestValidateStepNodes(TestCase):
+    def test_valid_adventure(self):
+        nodes = [
+            node('first', next_='second'),
+            node('second', back='first', choices=['third', 'fourth']),
+            node('third', back='second'),
+            node('fourth'),
+        ]
+        self.assertEqual(validate_step_nodes(nodes), [])
+
+    def test_missing_name(self):
+        problems = problems_by_code(validate_step_nodes([node('first', next_='second'), node(None), node('second')]))
+        self.assertEqual(problems['missing_name']['message'], '1 step(s) have no "name" attribute.')
+
+    def test_duplicated_names(self):
+        nodes = [node('first', next_='second'), node('second'), node('second')]
+        problems = problems_by_code(validate_step_nodes(nodes))
+        self.assertEqual(problems['duplicated_name']['steps'], ['second'])
+        self.assertEqual(problems['duplicated_name']['severity'], 'error')
+
+    def test_missing_first(self):
+        problems = problems_by_code(validate_step_nodes([node('start')]))
+        self.assertEqual(problems['first_step']['steps'], ['start'])
+
+    def test_invalid_references(self):
+        problems = problems_by_code(validate_step_nodes([
+            node('first', next_='nowhere'),
+            node('second', back='nowhere', choices=['first', None]),
+            node('third', choices=['unknown']),
+        ]))
+        self.assertEqual(problems['invalid_next']['steps'], ['first'])
+        self.assertEqual(problems['invalid_back']['steps'], ['second'])
+        self.assertEqual(problems['invalid_choice']['steps'], ['second', 'third'])
+
+    def test_empty_mcq(self):
+        problems = problems_by_code(validate_step_nodes([node('first')], empty_mcq_steps=['first']))
+        self.assertEqual(problems['empty_mcq']['steps'], ['first'])
+
+    def test_reports_graph_warnings(self):
+        problems = problems_by_code(validate_step_nodes([node('first'), node('orphan')]))
+        self.assertEqual(problems['unreachable']['steps'], ['orphan'])
+        self.assertEqual(problems['unreachable']['severity'], 'warning')
+
+
+class TestAnalyzeGraph(TestCase):
+    def test_valid_adventure(self):
+        graph = StepGraph([node('first', choices=['second', 'third']), node('second', next_='third'), node('third')])
+        self.assertEqual(analyze_graph(graph), [])
+
+    def test_no_first_step(self):
+        self.assertEqual(analyze_graph(StepGraph([node('start', next_='start')])), [])
+
+    def test_unreachable_steps(self):
+        graph = StepGraph([node('first'), node('second', next_='third'), node('third')])
+        problems = problems_by_code(analyze_graph(graph))
+        self.assertEqual(problems['unreachable']['steps'], ['second', 'third'])
+
+    def test_cycle_without_exit(self):
+        graph = StepGraph([
+            node('first', choices=['second', 'end']),
+            node('second', next_='third'),
+            node('third', next_='second'),
+            node('end'),
+        ])
+        problems = problems_by_code(analyze_graph(graph))
+        self.assertEqual(problems['cycle_without_exit']['steps'], ['second', 'third'])
+        self.assertNotIn('no_path_to_end', problems)
+
+    def test_self_loop_without_exit(self):
+        graph = StepGraph([node('first', choices=['loop', 'end']), node('loop', next_='loop'), node('end')])
+        problems = problems_by_code(analyze_graph(graph))
+        self.assertEqual(problems['cycle_without_exit']['steps'], ['loop'])
+
+    def test_cycle_with_exit(self):
+        graph = StepGraph([node('first', next_='second'), node('second', choices=['first', 'end']), node('end')])
+        self.assertEqual(analyze_graph(graph), [])
+
+    def test_no_path_to_end(self):
+        graph = StepGraph([
+            node('first', choices=['second', 'end']),
+            node('second', next_='third'),
+            node('third', next_='fourth'),
+            node('fourth', next_='third'),
+            node('end'),
+        ])
+        problems = problems_by_code(analyze_graph(graph))
+        self.assertEqual(problems['cycle_without_exit']['steps'], ['third', 'fourth'])
+        self.assertEqual(problems['no_path_to_end']['steps'], ['second'])
+
+    def test_no_final_step(self):
+        # Steps with a valid back step aren't final steps
+        graph = StepGraph([node('first', choices=['a', 'b']), node('a', back='first'), node('b', back='first')])
+        problems = problems_by_code(analyze_graph(graph))
+        self.assertEqual(set(problems), {'no_final_step'})
+        self.assertEqual(problems['no_final_step']['severity'], 'warning')
+
+    def test_back_leads_out_of_cycle(self):
+        graph = StepGraph([
+            node('first', choices=['second', 'end']),
+            node('second', next_='third'),
+            node('third', back='first', next_='second'),
+            node('end'),
+        ])
+        self.assertEqual(analyze_graph(graph), [])
+
+    def test_unreachable_back_target(self):
+        graph = StepGraph([node('first', back='orphan'), node('orphan')])
+        problems = problems_by_code(analyze_graph(graph))
+        self.assertEqual(problems['unreachable_back_target']['steps'], ['first'])
+
+
+class TestProgress(TestCase):
+    def setUp(self):
+        # The steps of the default adventure
+        self.graph = StepGraph([
+            node('first', choices=['last', 'second']),
+            node('second', choices=['last', 'third']),
+            node('third', back='second'),
+            node('last'),
+        ])
+
+    def test_is_terminal(self):
+        self.assertEqual([name for name in self.graph if self.graph.is_terminal(name)], ['last'])
+        self.assertFalse(self.graph.is_terminal('unknown'))
+        self.assertTrue(StepGraph([node('first', back='unknown')]).is_terminal('first'))
+        self.assertTrue(StepGraph([node('first', next_='unknown', choices=['unknown'])]).is_terminal('first'))
+
+    def test_compute_progress(self):
+        table = compute_progress(self.graph)
+        self.assertEqual({name: progress.fraction for name, progress in table.items()},
+                         {'first': 0.0, 'second': 0.5, 'third': 0.5, 'last': 1.0})
+        self.assertEqual(table['third'].min_to_end, 2)
+        self.assertEqual(table['last'].max_from_first, 2)
+
+    def test_progress_without_final_step(self):
+        table = compute_progress(StepGraph([node('first', choices=['a']), node('a', back='first')]))
+        self.assertEqual({progress.fraction for progress in table.values()}, {None})
+
+    def test_unreachable_end(self):
+        table = compute_progress(StepGraph([node('first', next_='second'), node('second', next_='first')]))
+        self.assertEqual(table['first'].min_to_end, None)
+        self.assertEqual(table['first'].fraction, None)
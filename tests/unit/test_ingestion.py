@@ -0,0 +1,108 @@
+from io import StringIO
+from unittest import TestCase
+
+from lxml import etree
+
+from adventure.graph import StepNode
+from adventure.ingestion import ingest_xml_content
+
+XML_CONTENT = """<adventure>
+    <info><p>Welcome</p></info>
+    <!-- The first step -->
+    <step name="first" next="second"><html><p>First</p></html></step>
+    <step name="second" back="first">
+        <mcq name="mcq" question="Where?">
+            <choice value="first">Back</choice>
+            <choice value="third">Forward</choice>
+        </mcq>
+        <ooyala-player content_id="abc"/>
+    </step>
+    <step name="third"><mcq name="empty"/></step>
+</adventure>"""
+
+
+class TestIngestXmlContent(TestCase):
+    def assert_stored_as_pretty_printed(self, xml_content):
+        expected = etree.tostring(etree.parse(StringIO(xml_content)), encoding='unicode', pretty_print=True)
+        self.assertEqual(ingest_xml_content(xml_content).xml_content, expected)
+
+    def test_stored_form(self):
+        self.assert_stored_as_pretty_printed(XML_CONTENT)
+
+    def test_compact_content_is_indented(self):
+        ingested = ingest_xml_content('<adventure><step name="first"><html><p>First</p></html></step></adventure>')
+        self.assertEqual(
+            ingested.xml_content,
+            '<adventure>\n  <step name="first">\n    <html>\n      <p>First</p>\n    </html>\n  </step>\n</adventure>\n'
+        )
+
+    def test_mixed_content_is_kept(self):
+        self.assert_stored_as_pretty_printed(
+            '<adventure>\n<step name="first"><html><p>A\nB</p> text</html></step>\n</adventure>')
+        self.assert_stored_as_pretty_printed('<adventure><!-- c --><step name="first"><p/>text</step></adventure>')
+
+    def test_comments(self):
+        self.assert_stored_as_pretty_printed('<adventure><!-- first --><step name="first"/><!-- last --></adventure>')
+        self.assertIn('<!-- The first step -->', ingest_xml_content(XML_CONTENT).xml_content)
+
+    def test_processing_instructions(self):
+        self.assert_stored_as_pretty_printed('<adventure><?first a?><step name="first"/><?last?></adventure>')
+        self.assert_stored_as_pretty_printed('<adventure>\n<?first a?>\n<step name="first"/></adventure>')
+        self.assert_stored_as_pretty_printed('<!-- before --><?before?><adventure/><?after?>')
+        self.assert_stored_as_pretty_printed(
+            '<?before?><adventure><step name="first"/></adventure><!-- after --><?after?>')
+
+    def test_namespaces(self):
+        self.assert_stored_as_pretty_printed(
+            '<adventure xmlns:a="urn:a"><a:x a:id="1"><a:y/></a:x><step name="first"/></adventure>')
+        self.assert_stored_as_pretty_printed('<adventure xmlns:a="urn:a">\n<a:x/>\n<!-- c --></adventure>')
+        self.assert_stored_as_pretty_printed('<a:adventure xmlns:a="urn:a" xmlns="urn:d"><a:x/><y/></a:adventure>')
+        ingested = ingest_xml_content('<adventure xmlns:a="urn:a"><a:x/></adventure>')
+        self.assertEqual(ingested.xml_content, '<adventure xmlns:a="urn:a">\n  <a:x/>\n</adventure>\n')
+
+    def test_empty_root(self):
+        for xml_content in ('<adventure/>', '<adventure></adventure>', '<adventure id="a"></adventure>'):
+            self.assert_stored_as_pretty_printed(xml_content)
+            self.assertEqual(ingest_xml_content(xml_content).nodes, [])
+
+    def test_steps(self):
+        ingested = ingest_xml_content(XML_CONTENT)
+        self.assertEqual(ingested.nodes, [
+            StepNode('first', None, 'second', ()),
+            StepNode('second', 'first', None, ('first', 'third')),
+            StepNode('third', None, None, ()),
+        ])
+        self.assertEqual(ingested.empty_mcq_steps, ['third'])
+        self.assertEqual(ingested.child_summaries, [
+            {'mcqs': 0, 'ooyala_players': 0, 'others': 1},
+            {'mcqs': 1, 'ooyala_players': 1, 'others': 0},
+            {'mcqs': 1, 'ooyala_players': 0, 'others': 0},
+        ])
+        self.assertTrue(ingested.has_info)
+        self.assertEqual(ingested.root_attributes, [])
+        self.assertFalse(ingest_xml_content('<adventure><step name="first"/></adventure>').has_info)
+
+    def test_root_attributes(self):
+        ingested = ingest_xml_content('<adventure display_name="Adventure" id="a"><step name="first"/></adventure>')
+        self.assertEqual(ingested.root_attributes, [['display_name', 'Adventure'], ['id', 'a']])
+
+    def test_content_spanning_chunks(self):
+        steps = ''.join('<step name="step{}" next="step{}"/>'.format(i, i + 1) for i in range(5000))
+        xml_content = '<adventure>{}</adventure>'.format(steps)
+        self.assert_stored_as_pretty_printed(xml_content)
+        self.assertEqual(len(ingest_xml_content(xml_content).nodes), 5000)
+
+    def test_max_size(self):
+        with self.assertRaises(ValueError):
+            ingest_xml_content(XML_CONTENT, max_size=len(XML_CONTENT) - 1)
+        ingest_xml_content(XML_CONTENT, max_size=len(XML_CONTENT))
+
+    def test_max_steps(self):
+        with self.assertRaises(ValueError):
+            ingest_xml_content(XML_CONTENT, max_steps=2)
+        self.assertEqual(len(ingest_xml_content(XML_CONTENT, max_steps=3).nodes), 3)
+
+    def test_syntax_error(self):
+        for xml_content in ('<adventure><step name="first"></adventure>', '', '<adventure/><adventure/>'):
+            with self.assertRaises(etree.XMLSyntaxError):
+                ingest_xml_content(xml_content)
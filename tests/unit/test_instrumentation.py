@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from adventure import instrumentation
+from adventure.instrumentation import (
+    NULL_INSTRUMENTATION, NULL_SPAN, Instrumentation, MemorySink, get_instrumentation, instrumented
+)
+from tests.utils import setup_django
+
+
+class InstrumentedObject(object):  # pylint: disable=useless-object-inheritance
+    def __init__(self, sink):
+        self.instrumentation = Instrumentation(sink)
+
+    @instrumented('handler.answer')
+    def answer(self, value):
+        return value
+
+
+def failing_sink(name, duration_ms):
+    raise RuntimeError('{} {}'.format(name, duration_ms))
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self):
+        setup_django()
+        instrumentation._instrumentations.clear()  # pylint: disable=protected-access
+
+    def test_disabled(self):
+        for config in (None, {}, {'sink': None}, {'prefix': 'adventure'}):
+            self.assertIs(get_instrumentation(config), NULL_INSTRUMENTATION)
+        self.assertFalse(NULL_INSTRUMENTATION.enabled)
+        with NULL_INSTRUMENTATION.span('render') as span:
+            self.assertIs(span, NULL_SPAN)
+
+    def test_span_names(self):
+        sink = MemorySink()
+        with Instrumentation(sink).span('render'):
+            pass
+        with Instrumentation(sink, prefix='course').span('render'):
+            pass
+        with Instrumentation(sink, prefix='').span('render'):
+            pass
+        self.assertEqual(sorted(sink.durations), ['adventure.render', 'course.render', 'render'])
+        self.assertTrue(all(duration >= 0 for duration in sink.durations['adventure.render']))
+
+    def test_memory_sink(self):
+        config = {'sink': 'memory', 'prefix': 'test'}
+        enabled = get_instrumentation(config)
+        self.assertTrue(enabled.enabled)
+        self.assertIs(get_instrumentation(dict(config)), enabled)
+        with enabled.span('render'):
+            pass
+        self.assertEqual(len(enabled.sink.durations['test.render']), 1)
+        enabled.sink.clear()
+        self.assertEqual(dict(enabled.sink.durations), {})
+
+    def test_instrumented(self):
+        sink = MemorySink()
+        self.assertEqual(InstrumentedObject(sink).answer(42), 42)
+        self.assertEqual(len(sink.durations['adventure.handler.answer']), 1)
+
+    def test_failing_sink(self):
+        with self.assertLogs('adventure.instrumentation', 'ERROR'):
+            self.assertEqual(InstrumentedObject(failing_sink).answer(42), 42)
+        # The exceptions of the timed code are not swallowed
+        with self.assertLogs('adventure.instrumentation', 'ERROR'), self.assertRaises(ValueError):
+            with Instrumentation(failing_sink).span('render'):
+                raise ValueError('render')
+
+    def test_dotted_path_sink(self):
+        enabled = get_instrumentation({'sink': 'tests.unit.test_instrumentation.failing_sink'})
+        self.assertIs(enabled.sink, failing_sink)
+
+    def test_invalid_dotted_path_sink(self):
+        for sink in ('tests.unit.test_instrumentation.missing_sink', 'missing.module.sink', 'nodots'):
+            with self.assertLogs('adventure.instrumentation', 'ERROR'):
+                self.assertIs(get_instrumentation({'sink': sink}), NULL_INSTRUMENTATION)
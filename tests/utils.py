@@ -0,0 +1,101 @@
+"""
+In-memory runtime of the AdventureBlock, shared by the unit tests and the benchmarks.
+"""
+import json
+
+import django
+from django.conf import settings
+from webob import Request
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+from xblock.runtime import NullI18nService
+from xblock.test.tools import TestRuntime
+
+
+class InMemoryRuntime(TestRuntime):  # pylint: disable=abstract-method
+    """
+    In-memory runtime, without any I/O, recording the published events.
+    """
+    # pylint: disable=arguments-differ
+    __test__ = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = []
+
+    def handler_url(self, block, handler_name, suffix='', query='', thirdparty=False):
+        return '/handler/{}'.format(handler_name)
+
+    def local_resource_url(self, block, uri):
+        return '/resource/{}'.format(uri)
+
+    def resource_url(self, resource):
+        return '/resource/{}'.format(resource)
+
+    def publish(self, block, event_type, event_data):
+        self.events.append((event_type, event_data))
+
+
+class SettingsService(object):  # pylint: disable=useless-object-inheritance
+    """
+    XBlock settings service, returning the same settings bucket to every block.
+    """
+
+    def __init__(self, settings_bucket):
+        self.settings_bucket = settings_bucket
+
+    def get_settings_bucket(self, block, default=None):  # pylint: disable=unused-argument
+        return self.settings_bucket
+
+
+class AdventureSession(object):  # pylint: disable=useless-object-inheritance
+    """
+    A student going through an adventure, one request at a time: every request builds
+    a new block, as the LMS does, whose field data persists between requests.
+
+    `adventure_settings` are the adventure settings, see the README.
+    """
+
+    def __init__(self, xml_content, adventure_settings=None):
+        from adventure.adventure import AdventureBlock  # pylint: disable=import-outside-toplevel
+
+        self.block_class = AdventureBlock
+        self.xml_content = xml_content
+        self.field_data = DictFieldData({'xml_content': xml_content})
+        self.runtime = InMemoryRuntime(services={
+            'field-data': self.field_data,
+            'i18n': NullI18nService(),
+            'settings': SettingsService(adventure_settings or {}),
+        })
+        self.step = None
+
+    def new_block(self):
+        scope_ids = ScopeIds('student', 'adventure', 'adventure-def', 'adventure-usage')
+        return self.runtime.construct_xblock_from_class(self.block_class, scope_ids)
+
+    def call(self, handler_name, data=None):
+        """
+        Calls a json handler on a new block, and returns the decoded response.
+        """
+        block = self.new_block()
+        request = Request.blank('/', method='POST', body=json.dumps(data or {}).encode('utf-8'))
+        response = json.loads(block.handle(handler_name, request).body.decode('utf-8'))
+        if response.get('step'):
+            self.step = response['step']
+        return response
+
+    @property
+    def completions(self):
+        """
+        Returns the completions reported so far.
+        """
+        return [data['completion'] for event_type, data in self.runtime.events if event_type == 'completion']
+
+
+def setup_django():
+    if not settings.configured:
+        settings.configure(
+            USE_I18N=True,
+            TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates'}],
+        )
+        django.setup()